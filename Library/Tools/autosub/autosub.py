@@ -3,12 +3,15 @@ import os
 import sys
 import argparse
 import subprocess
-import glob
 import time
 import re
 import shutil
 import json
+import hashlib
 import io
+import asyncio
+import contextvars
+import collections
 
 # System and Third-party imports
 
@@ -23,25 +26,36 @@ if sys.platform == "win32":
         pass
 
 # --- Logging Helper ---
+# workflow.log of the job whose stage is currently running (each pipeline task has its own context)
+_JOB_LOG = contextvars.ContextVar("job_log", default=None)
+
 class Logger:
-    def __init__(self, log_path):
-        self.terminal = sys.stdout
-        self.log_file = open(log_path, "a", encoding="utf-8", errors="replace")
+    FLUSH_INTERVAL = 0.1 # Coalesce terminal flushes; progress lines still go out immediately
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+        self._last_flush = time.monotonic()
+        self._urgent = False
         
     def write(self, message):
         self.terminal.write(message)
-        self.log_file.write(message)
-        self.terminal.flush()
-        self.log_file.flush()
+        if "Progress:" in message: self._urgent = True # print() writes the newline separately
+        if message.endswith('\n'):
+            now = time.monotonic()
+            if self._urgent or now - self._last_flush > self.FLUSH_INTERVAL:
+                self.terminal.flush()
+                self._last_flush = now
+                self._urgent = False
+        log_file = _JOB_LOG.get()
+        if log_file:
+            log_file.write(message) # Buffered; flushed by _log_flusher / on close
         
     def flush(self):
         self.terminal.flush()
-        self.log_file.flush()
-
-    def close(self):
-        if self.log_file:
-            self.log_file.close()
-            self.log_file = None
+        self._last_flush = time.monotonic()
+        log_file = _JOB_LOG.get()
+        if log_file:
+            log_file.flush()
 
 # --- Configuration ---
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -53,9 +67,6 @@ if os.path.exists(DEFAULTS_FILE):
             DEFAULTS = json.load(f)
     except: pass
 
-import multiprocessing
-multiprocessing.freeze_support()
-
 # --- Environment Setup (Isolation Logic) ---
 if getattr(sys, 'frozen', False):
     # Packaged / Installer Mode
@@ -87,16 +98,41 @@ else:
     sys.path.append(os.path.join(TOOLS_DIR, "common"))
     print(f"🏠 [DEV MODE] Root: {PROJECT_ROOT}")
 
-# Load srt_utils after path setup
-try:
-    import srt_utils
-except ImportError:
-    srt_utils = None
+# srt_utils is only needed by the reuse checks; imported there on first use
+def _srt_utils():
+    try:
+        import srt_utils
+        return srt_utils
+    except ImportError:
+        return None
 
 # --- Robust FFmpeg/ffprobe Detection ---
+def _find_tool_in_registry(tool_name):
+    """Looks up FFmpeg's InstallLocation in the Windows uninstall keys (MSI / WinGet installs)."""
+    try:
+        import winreg
+    except ImportError:
+        return None
+    uninstall_keys = [r"Software\Microsoft\Windows\CurrentVersion\Uninstall",
+                      r"Software\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"]
+    for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        for sub in uninstall_keys:
+            try: key = winreg.OpenKey(hive, sub)
+            except OSError: continue
+            with key:
+                for i in range(winreg.QueryInfoKey(key)[0]):
+                    try:
+                        with winreg.OpenKey(key, winreg.EnumKey(key, i)) as app:
+                            if "ffmpeg" not in str(winreg.QueryValueEx(app, "DisplayName")[0]).lower(): continue
+                            location = winreg.QueryValueEx(app, "InstallLocation")[0]
+                    except OSError: continue
+                    if not location: continue
+                    for cand in (os.path.join(location, "bin", tool_name + ".exe"), os.path.join(location, tool_name + ".exe")):
+                        if os.path.exists(cand): return cand
+    return None
+
 def find_tool(tool_name):
     """Finds a tool in PATH or common installation directories."""
-    import shutil
     # 0. Check bundled internal path (if frozen)
     if getattr(sys, 'frozen', False):
         bundle_dir = getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
@@ -110,19 +146,26 @@ def find_tool(tool_name):
     path = shutil.which(tool_name)
     if path: return path
     
-    # 2. Check WinGet Gyan FFmpeg (User Specific)
+    # 2. Registry uninstall entries: one lookup instead of walking directories
+    if sys.platform == "win32":
+        path = _find_tool_in_registry(tool_name)
+        if path: return path
+
+    # 3. Check WinGet Gyan FFmpeg (User Specific)
     user_home = os.path.expanduser("~")
     winget_base = os.path.join(user_home, "AppData", "Local", "Microsoft", "Winget", "Packages")
     if os.path.exists(winget_base):
         # Search for Gyan FFmpeg
         for d in os.listdir(winget_base):
             if "Gyan.FFmpeg" in d:
-                # Glob search for the bin folder
-                for bin_dir in glob.glob(os.path.join(winget_base, d, "**/bin"), recursive=True):
-                    tool_path = os.path.join(bin_dir, tool_name + ".exe")
-                    if os.path.exists(tool_path): return tool_path
-
-    # 3. Check common hardcoded paths
+                # Walk down to the first bin folder (no need to materialize the whole tree)
+                for root, dirs, files in os.walk(os.path.join(winget_base, d)):
+                    if os.path.basename(root) == "bin":
+                        tool_path = os.path.join(root, tool_name + ".exe")
+                        if os.path.exists(tool_path): return tool_path
+                        dirs[:] = []
+
+    # 4. Check common hardcoded paths
     fallbacks = [
         r"C:\ffmpeg\bin",
         r"C:\Program Files\ffmpeg\bin",
@@ -135,7 +178,8 @@ def find_tool(tool_name):
         if os.path.exists(capcut_root):
             # Find latest version folder
             try:
-                versions = [d for d in os.listdir(capcut_root) if os.path.isdir(os.path.join(capcut_root, d)) and "." in d]
+                with os.scandir(capcut_root) as it:
+                    versions = [e.name for e in it if "." in e.name and e.is_dir()]
                 if versions:
                     latest = sorted(versions, key=lambda x: [int(v) for v in x.split('.') if v.isdigit()], reverse=True)[0]
                     fallbacks.append(os.path.join(capcut_root, latest))
@@ -147,14 +191,63 @@ def find_tool(tool_name):
         
     return tool_name # Fallback to original name and hope for the best
 
-FFMPEG_EXE = find_tool("ffmpeg")
-FFPROBE_EXE = find_tool("ffprobe")
+# Resolved tool paths are persisted so repeated launches (GUI / batch) skip the scan
+TOOL_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".autosub_tools.json")
+
+def _load_tool_cache():
+    try:
+        with open(TOOL_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+def _save_tool_cache(cache):
+    tmp = f"{TOOL_CACHE_PATH}.{os.getpid()}.tmp" # per process: Pool workers may save at the same time
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp, TOOL_CACHE_PATH)
+    except:
+        pass
+
+_tool_cache = _load_tool_cache()
+if all(os.path.exists(_tool_cache.get(t, "")) for t in ("ffmpeg", "ffprobe")):
+    FFMPEG_EXE = _tool_cache["ffmpeg"]
+    FFPROBE_EXE = _tool_cache["ffprobe"]
+else:
+    FFMPEG_EXE = find_tool("ffmpeg")
+    FFPROBE_EXE = find_tool("ffprobe")
+    # Only persist real paths; a bare name means the search failed
+    if os.path.isabs(FFMPEG_EXE) and os.path.isabs(FFPROBE_EXE):
+        _tool_cache.update({"ffmpeg": FFMPEG_EXE, "ffprobe": FFPROBE_EXE})
+        _save_tool_cache(_tool_cache)
 
 if FFMPEG_EXE != "ffmpeg":
     print(f"📦 Found FFmpeg at: {FFMPEG_EXE}")
     # Add to path for sub-scripts
     os.environ["PATH"] += os.pathsep + os.path.dirname(FFMPEG_EXE)
 
+def detect_hwaccel():
+    """
+    Picks the H.264 encoder for burning with burn_engine's own probe (so both always agree) and
+    caches it in the tools JSON; the result is handed to burn_engine via --encoder.
+    """
+    cached = _tool_cache.get("encoder")
+    if cached and cached.get("ffmpeg") == FFMPEG_EXE:
+        return cached["name"]
+    name = "libx264"
+    try:
+        hardsubber_dir = os.path.join(TOOLS_DIR, "hardsubber")
+        if hardsubber_dir not in sys.path:
+            sys.path.append(hardsubber_dir)
+        import burn_engine
+        name = burn_engine.get_optimized_encoder(FFMPEG_EXE)[0]
+    except Exception as e:
+        print(f"⚠️ Encoder probe failed ({e}), using libx264.")
+    _tool_cache["encoder"] = {"ffmpeg": FFMPEG_EXE, "name": name}
+    _save_tool_cache(_tool_cache)
+    return name
+
 VDOWN_CMD = [sys.executable, os.path.join(TOOLS_DIR, "vdown", "download.py")]
 TRANSCRIBER_CMD = [sys.executable, os.path.join(TOOLS_DIR, "transcriber", "transcribe_engine.py"), "run"]
 SMART_TRANSLATE_CMD = [sys.executable, os.path.join(TOOLS_DIR, "autosub", "smart_translate.py")]
@@ -164,11 +257,14 @@ BURNSUB_CMD = [sys.executable, os.path.join(TOOLS_DIR, "hardsubber", "burn_engin
 
 if os.path.exists(env_path):
     try:
-        with open(env_path, 'r', encoding='utf-8') as f:
-            for line in f :
-                if '=' in line and not line.strip().startswith('#'):
-                    k, v = line.strip().split('=', 1)
-                    if k and v: os.environ[k] = v.strip('"\'')
+        # One read + splitlines instead of iterating the file object
+        with open(env_path, 'rb') as f:
+            txt = f.read().decode('utf-8', 'replace')
+        for line in txt.splitlines():
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line: continue
+            k, v = line.split('=', 1)
+            if k and v: os.environ[k] = v.strip('"\'')
     except: pass
 
 def get_workdir(input_val, base_output_dir):
@@ -195,24 +291,74 @@ def get_video_title(url, cookies=None):
     except: pass
     return None
 
+# Reserved filename characters -> '_' (str.translate does the per-char mapping in C)
+_SAN_TABLE = str.maketrans({c: '_' for c in '\\/*?:"<>|'})
+
 def sanitize_filename(filename):
     """Cleans a string to be a safe filename."""
-    clean = re.sub(r'[\\/*?:"<>|]', '_', filename)
+    clean = filename.translate(_SAN_TABLE)
     clean = clean.strip().strip('.') # Strip trailing spaces and dots
-    clean = re.sub(r'\s+', ' ', clean).strip()
+    clean = ' '.join(clean.split()) # Collapse whitespace runs
     return clean[:100] # Limit length
 
-def download_video(url, workdir, cookies=None):
+def _creationflags():
+    return subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+PIPE_BUFFER = 1 << 20 # 1 MiB stream buffer so chatty children rarely block on a full pipe
+READ_CHUNK = 1 << 16
+PROGRESS_MARK = b"Progress:" # Checked on raw bytes, before decoding
+
+async def _run_streamed(cmd, tag=None, env=None, stdin=None):
+    """
+    Runs a child process and echoes its combined stdout/stderr as it arrives.
+    Progress lines are printed verbatim (the GUI regex relies on it); other lines get `tag` as prefix.
+    Returns (returncode, last_logs).
+    """
+    process = await asyncio.create_subprocess_exec(*cmd, stdin=stdin, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, env=env, limit=PIPE_BUFFER, creationflags=_creationflags())
+    last_logs = collections.deque(maxlen=50) # Tail kept for error dumps
+    pending = b""
+    while True:
+        # Read whatever is buffered (up to 64 KiB) instead of one readline() per log line
+        chunk = await process.stdout.read(READ_CHUNK)
+        if chunk:
+            *lines, pending = (pending + chunk).split(b"\n")
+        else:
+            lines, pending = [pending], b""
+        for raw in lines:
+            raw = raw.strip()
+            if not raw: continue
+            msg = raw.decode('utf-8', errors='replace')
+            if tag is None or PROGRESS_MARK in raw:
+                print(msg)
+            else:
+                print(f"   [{tag}] {msg}")
+            last_logs.append(msg)
+        if not chunk: break
+    await process.wait()
+    return process.returncode, list(last_logs)
+
+VIDEO_EXT = {'.mp4', '.mkv', '.webm', '.ts', '.mov', '.avi'}
+
+shutil.COPY_BUFSIZE = 16 * 1024 * 1024 # Used by copyfile's buffered path (Windows); Linux already uses sendfile
+
+def stage_copy(src, dst):
+    """Stages an input video into the project folder: hardlink on the same volume (zero copy), else a byte copy."""
+    try:
+        os.link(src, dst)
+        return
+    except (OSError, NotImplementedError, AttributeError):
+        pass
+    shutil.copyfile(src, dst)
+    shutil.copystat(src, dst) # Keep mtime: the probe cache and stage markers key on it
+
+async def download_video(url, workdir, cookies=None):
     print(f"🎬 Downloading {url}...", flush=True)
     if not os.path.exists(workdir): os.makedirs(workdir)
     cmd = list(VDOWN_CMD) + [url, cookies or "", workdir]
-    try: 
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace', bufsize=1, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
-        for line in process.stdout:
-            print(line.strip(), flush=True)
-        process.wait()
-        if process.returncode != 0:
-            raise subprocess.CalledProcessError(process.returncode, cmd)
+    try:
+        returncode, last_logs = await _run_streamed(cmd)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
     except subprocess.CalledProcessError as e:
         print(f"❌ Download command failed with code {e.returncode}")
         print("💡 Tip: If you see 'Sign in to confirm you’re not a bot', try providing a cookies file using --cookies.")
@@ -221,32 +367,77 @@ def download_video(url, workdir, cookies=None):
         print(f"❌ Error launching download: {e}")
         return None
         
-    vids = [f for f in glob.glob(os.path.join(workdir, "*")) if os.path.splitext(f)[1].lower() in ['.mp4', '.mkv', '.webm', '.ts', '.mov', '.avi']]
-    if not vids:
+    # download.py reports the final path; no need to guess from the directory
+    for line in reversed(last_logs):
+        if line.startswith("FILE: "):
+            path = line[6:].strip()
+            if os.path.exists(path): return path
+            break
+
+    # Fallback: newest video in workdir, one scandir pass (DirEntry caches the stat)
+    best = None
+    with os.scandir(workdir) as it:
+        for e in it:
+            if e.is_file() and os.path.splitext(e.name)[1].lower() in VIDEO_EXT:
+                m = e.stat().st_mtime
+                if best is None or m > best[0]: best = (m, e.path)
+    if not best:
         print(f"❌ No video files found in {workdir} after download attempt.")
         return None
         
-    return max(vids, key=os.path.getmtime)
+    return best[1]
 
-def transcribe_video(video_path, workdir, model="large-v3-turbo"):
+async def transcribe_video(video_path, workdir, model="large-v3-turbo"):
     print(f"🎙️ Transcribing {os.path.basename(video_path)}...", flush=True)
-    cmd = list(TRANSCRIBER_CMD) + [video_path, "--model", model, "--output", workdir, "--no-gui"]
+    # Decode audio once in ffmpeg (16 kHz mono s16le, what Whisper consumes) and pipe it straight
+    # into the transcriber, so it never re-demuxes the whole video container from disk
+    cmd = list(TRANSCRIBER_CMD) + ["-", "--name", os.path.basename(video_path), "--duration", str(await asyncio.to_thread(get_video_duration, video_path)),
+                                   "--model", model, "--output", workdir, "--no-gui"]
     try:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace', bufsize=1, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
-        for line in process.stdout:
-            print(line.strip(), flush=True)
-        process.wait()
+        read_fd, write_fd = os.pipe()
+        try:
+            ffmpeg_proc = await asyncio.create_subprocess_exec(
+                FFMPEG_EXE, "-v", "error", "-i", video_path, "-vn", "-f", "s16le", "-ac", "1", "-ar", "16000", "-",
+                stdout=write_fd, stderr=asyncio.subprocess.DEVNULL, creationflags=_creationflags())
+        finally:
+            os.close(write_fd) # Child holds its own copy; transcriber sees EOF when ffmpeg exits
+        try:
+            await _run_streamed(cmd, stdin=read_fd)
+        finally:
+            os.close(read_fd)
+        if await ffmpeg_proc.wait() != 0:
+            print(f"⚠️ Audio extraction exited with code {ffmpeg_proc.returncode}")
         res = os.path.join(workdir, os.path.splitext(os.path.basename(video_path))[0] + ".srt")
         if os.path.exists(res):
             en_res = res.replace(".srt", ".en.srt")
             if not os.path.exists(en_res):
-                shutil.copy2(res, en_res)
+                try:
+                    os.link(res, en_res) # Same folder: hardlink, nothing copied
+                except (OSError, NotImplementedError, AttributeError):
+                    await asyncio.to_thread(shutil.copy2, res, en_res)
                 print(f"✅ Created copy: {os.path.basename(en_res)}")
             return res
         return None
     except: return None
 
-def merge_bilingual(src_srt, zh_srt, main_lang="cn", llm_model="gemini-3.1-pro-preview"):
+async def smart_translate(src_srt, style, llm_model):
+    print("🌍 Smart-translating...")
+    cmd = list(SMART_TRANSLATE_CMD) + [src_srt, "--style", style, "--model", llm_model]
+    returncode, _ = await _run_streamed(cmd)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+async def translate_and_merge(src_srt, style, llm_model):
+    """Translate + merge + fill in a single subtranslator run; the source SRT is parsed only once."""
+    print("🌍 Smart-translating and merging in one pass...")
+    bi_path = src_srt[:-7] + ".bi.srt" if src_srt.lower().endswith(".en.srt") else src_srt.replace(".srt", ".bi.srt")
+    cmd = list(SUBTRANSLATOR_CMD) + ["pipeline", src_srt, "--style", style, "--model", llm_model]
+    returncode, _ = await _run_streamed(cmd)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return bi_path if os.path.exists(bi_path) else None
+
+async def merge_bilingual(src_srt, zh_srt, main_lang="cn", llm_model="gemini-3.1-pro-preview"):
     print(f"🔀 Smart-Merging into bilingual SRT...")
     bi_path = src_srt[:-7] + ".bi.srt" if src_srt.lower().endswith(".en.srt") else src_srt.replace(".srt", ".bi.srt")
     
@@ -261,38 +452,64 @@ def merge_bilingual(src_srt, zh_srt, main_lang="cn", llm_model="gemini-3.1-pro-p
     env = os.environ.copy(); env["GEMINI_MODEL"] = llm_model
     
     try:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace', env=env, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
-        for line in process.stdout:
-            msg = line.strip()
-            if "Progress:" in msg:
-                print(msg, flush=True)
-            else:
-                print(f"   [Merge] {msg}", flush=True)
-        process.wait()
-        
-        if process.returncode == 0 and os.path.exists(bi_path):
+        returncode, _ = await _run_streamed(cmd, tag="Merge", env=env)
+        if returncode == 0 and os.path.exists(bi_path):
             return bi_path
         else:
-            print(f"❌ Merge process failed with code {process.returncode}")
+            print(f"❌ Merge process failed with code {returncode}")
             return None
     except Exception as e:
         print(f"❌ Merge launch error: {e}")
         return None
 
-def burn_subtitle(video_path, srt_path, layout, main_lang, cn_font, en_font, cn_size, en_size, cn_color, en_color, bg_box=True):
+# Same names/values as srt_to_ass.py's color_map (ASS &HAABBGGRR)
+ASS_COLORS = {"White": "&H00FFFFFF", "Yellow": "&H0000FFFF", "Black": "&H00000000", "Gold": "&H0000D7FF",
+              "Golden": "&H0000D7FF", "Blue": "&H00FF0000", "Green": "&H0000FF00"}
+# Pixel sizes at 1080p per language, as in srt_to_ass.py's size_presets
+SIZE_PRESETS = {"big": {"cn": 70, "en": 46}, "middle": {"cn": 58, "en": 38}, "small": {"cn": 46, "en": 30}}
+
+def build_force_style(font, size, color, bg_box, width, height, lang="cn"):
+    """
+    libass force_style for burning a single-language SRT straight through ffmpeg's subtitles filter.
+    SRT scripts are laid out on a 288-line canvas, so 1080p pixel sizes are rescaled to it.
+    """
+    try: px = int(size)
+    except: px = SIZE_PRESETS.get(size, SIZE_PRESETS["middle"])[lang]
+    scale = 288 / 1080.0
+    if width < height: scale *= 1.2 # Same vertical-video boost as srt_to_ass.py
+    style = [f"Fontname={font}", f"Fontsize={int(px * scale)}", f"PrimaryColour={ASS_COLORS.get(color, color)}",
+             "Bold=1", "Alignment=2", f"MarginV={int(288 * 0.035)}"]
+    if bg_box:
+        style += ["BorderStyle=3", "Outline=1", "Shadow=0", "OutlineColour=&H80202020", "BackColour=&H80202020"]
+    else:
+        style += ["BorderStyle=1", "Outline=1", "Shadow=0", "OutlineColour=&H00000000"]
+    return ",".join(style)
+
+async def burn_subtitle(video_path, srt_path, layout, main_lang, cn_font, en_font, cn_size, en_size, cn_color, en_color, bg_box=True, threads=None):
     print("🔥 Burning subtitles...", flush=True)
     base_srt, _ = os.path.splitext(srt_path)
     ass_path = base_srt + ".ass"
     
     # --- Get Video Dimensions for Styling ---
-    width, height = get_video_dimensions(video_path)
+    width, height = await asyncio.to_thread(get_video_dimensions, video_path)
     print(f"📐 Video Resolution: {width}x{height}")
 
-    if not os.path.exists(ass_path):
+    # Single-language layouts need just one style: burn the SRT directly (no srt_to_ass process, no .ass file)
+    style_args = []
+    if layout in ("cn", "en"):
+        if layout == "cn":
+            force_style = build_force_style(cn_font, cn_size, cn_color, bg_box, width, height, "cn")
+        else:
+            force_style = build_force_style(en_font, en_size, en_color, bg_box, width, height, "en")
+        ass_path = srt_path
+        style_args = ["--force-style", force_style]
+    elif not os.path.exists(ass_path):
         cmd = list(SRT2ASS_CMD) + [srt_path, ass_path, "--layout", layout, "--main-lang", main_lang, "--cn-font", cn_font, "--en-font", en_font, "--cn-size", cn_size, "--en-size", en_size, "--cn-color", cn_color, "--en-color", en_color]
         cmd += ["--width", str(width), "--height", str(height)]
         if not bg_box: cmd.append("--no-bg-box")
-        subprocess.run(cmd, check=True)
+        returncode, _ = await _run_streamed(cmd)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
         
     video_base = os.path.splitext(os.path.basename(video_path))[0]
     video_ext = os.path.splitext(video_path)[1]
@@ -309,27 +526,17 @@ def burn_subtitle(video_path, srt_path, layout, main_lang, cn_font, en_font, cn_
         except Exception as e:
             print(f"⚠️ Warning: Could not remove existing output: {e}")
 
-    cmd = list(BURNSUB_CMD) + [video_path, ass_path, out_video, "--headless"]
+    encoder = await asyncio.to_thread(detect_hwaccel)
+    cmd = list(BURNSUB_CMD) + [video_path, ass_path, out_video, "--headless", "--encoder", encoder] + style_args
+    if threads:
+        cmd += ["--threads", str(threads)]
     try:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace', creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
-        last_logs = []
-        for line in process.stdout:
-            msg = line.strip()
-            if msg:
-                # If it's a progress line, don't prefix it so it's cleaner for the GUI regex
-                if "Progress:" in msg:
-                    print(msg, flush=True)
-                else:
-                    print(f"   [Burn] {msg}", flush=True)
-                last_logs.append(msg)
-                if len(last_logs) > 50: last_logs.pop(0)
-        
-        process.wait()
-        if process.returncode != 0:
-            print(f"❌ Burn failed with exit code {process.returncode}")
+        returncode, last_logs = await _run_streamed(cmd, tag="Burn")
+        if returncode != 0:
+            print(f"❌ Burn failed with exit code {returncode}")
             # If logs didn't print or were short, show them again
             if not last_logs: print("   No log output captured.")
-            raise subprocess.CalledProcessError(process.returncode, cmd)
+            raise subprocess.CalledProcessError(returncode, cmd)
             
     except Exception as e:
         if isinstance(e, subprocess.CalledProcessError): raise e
@@ -337,112 +544,194 @@ def burn_subtitle(video_path, srt_path, layout, main_lang, cn_font, en_font, cn_
         return None
     return out_video if os.path.exists(out_video) else None
 
-def get_video_duration(path):
+_PROBE_MEMO = {} # (name, size, mtime) -> (width, height, duration); a copy2'd video hits the same entry
+# Persisted probe results, one small file per (path, mtime, size): never written next to the user's videos
+PROBE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".autosub_probes")
+
+def _probe_all(path):
+    """
+    Returns (width, height, duration) from one narrow ffprobe call, memoized and persisted
+    under PROBE_CACHE_DIR (keyed by path + mtime + size). Falls back to (1920, 1080, 0).
+    """
     try:
-        cmd = [FFPROBE_EXE, "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", path]
-        return float(subprocess.check_output(cmd).decode().strip())
-    except: return 0
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        key = (os.path.basename(path).lower(), st.st_size, int(st.st_mtime))
+        if key in _PROBE_MEMO: return _PROBE_MEMO[key]
+
+        digest = hashlib.sha1(f"{path}|{st.st_mtime_ns}|{st.st_size}".encode("utf-8")).hexdigest()
+        cache_file = os.path.join(PROBE_CACHE_DIR, digest + ".json")
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                _PROBE_MEMO[key] = tuple(json.load(f))
+            return _PROBE_MEMO[key]
+        except: pass
+
+        # Only the entries we use: first video stream size + container duration
+        cmd = [FFPROBE_EXE, "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height:format=duration", "-of", "json", path]
+        probe = json.loads(subprocess.check_output(cmd, creationflags=_creationflags()).decode("utf-8", errors="replace"))
+        stream = (probe.get("streams") or [{}])[0]
+        try: duration = float(probe.get("format", {}).get("duration", 0))
+        except: duration = 0
+        whd = (int(stream.get("width") or 1920), int(stream.get("height") or 1080), duration)
+        try:
+            os.makedirs(PROBE_CACHE_DIR, exist_ok=True)
+            tmp = f"{cache_file}.{os.getpid()}.tmp" # per process: Pool workers may probe the same file
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(whd, f)
+            os.replace(tmp, cache_file)
+        except: pass
+        _PROBE_MEMO[key] = whd
+        return whd
+    except:
+        return 1920, 1080, 0
+
+def get_video_duration(path):
+    return _probe_all(path)[2]
 
 def get_video_dimensions(path):
     """Returns (width, height) using ffprobe."""
+    width, height, _ = _probe_all(path)
+    return width, height
+
+def _prewarm_probes(inputs, wait=False):
+    """
+    Probes all local inputs concurrently (ffprobe is single-threaded; files parallelize).
+    Runs once in the parent: in the background for a single process, or to completion before
+    forking Pool workers, which then read the results from PROBE_CACHE_DIR.
+    """
+    local = [os.path.abspath(i) for i in inputs if not i.startswith("http") and os.path.exists(i)]
+    if len(local) < 2: return
+    from concurrent.futures import ThreadPoolExecutor
+    probe_pool = ThreadPoolExecutor(max_workers=min(8, len(local)))
+    for path in local:
+        probe_pool.submit(_probe_all, path)
+    probe_pool.shutdown(wait=wait)
+
+# --- Stage Markers ---
+# <workdir>/.stage_done.json: {stage: {"inputs": {path: mtime}, "outputs": {name: path}, "params": ...}}
+# A stage is skipped on rerun when its inputs are unchanged and its outputs still exist: O(stat), no parsing.
+STAGE_FILE = ".stage_done.json"
+
+def _load_stages(workdir):
     try:
-        cmd = [FFPROBE_EXE, "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height", "-of", "csv=p=0:s=x", path]
-        out = subprocess.check_output(cmd).decode().strip()
-        if "x" in out:
-            w, h = out.split("x")
-            return int(w), int(h)
+        with open(os.path.join(workdir, STAGE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except:
+        return {}
+
+def _stage_ok(workdir, stage, inputs, params=None):
+    """Returns the recorded outputs of `stage` if it can be skipped, else None."""
+    rec = _load_stages(workdir).get(stage)
+    if not rec or rec.get("params") != params: return None
+    try:
+        if set(rec["inputs"]) != set(inputs): return None
+        for path in inputs:
+            if os.path.getmtime(path) != rec["inputs"][path]: return None
+        if not all(os.path.exists(p) for p in rec["outputs"].values()): return None
+    except: return None
+    return rec["outputs"]
+
+def _mark_stage(workdir, stage, inputs, outputs, params=None):
+    stages = _load_stages(workdir)
+    try:
+        stages[stage] = {"inputs": {p: os.path.getmtime(p) for p in inputs}, "outputs": outputs, "params": params}
+        path = os.path.join(workdir, STAGE_FILE)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stages, f, indent=2)
+        os.replace(tmp, path)
     except: pass
-    return 1920, 1080
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("input")
-    parser.add_argument("--model", default="large-v3-turbo")
-    parser.add_argument("--llm-model", default="gemini-1.5-flash", help="LLM Model (gemini-1.5-flash, gpt-4o, moonshot-v1-8k, qwen-plus, glm-4, etc.)")
-    parser.add_argument("--style", default="casual")
-    parser.add_argument("--cookies")
-    parser.add_argument("--layout", default="bilingual")
-    parser.add_argument("--main-lang", default="cn")
-    parser.add_argument("--cn-font", default="KaiTi")
-    parser.add_argument("--en-font", default="Arial")
-    parser.add_argument("--cn-size", default="60")
-    parser.add_argument("--en-size", default="36")
-    parser.add_argument("--cn-color", default="Gold")
-    parser.add_argument("--en-color", default="White")
-    parser.add_argument("--no-bg-box", action="store_true")
-    parser.add_argument("--output-dir", help="Project root directory for output files")
-    args = parser.parse_args()
+# --- Pipeline Stages ---
+# Each stage takes a job dict, fills in its outputs and returns True to hand the job downstream.
+# Blocking work (title lookup, ffprobe, large copies) goes through asyncio.to_thread so one job's
+# stage never stalls the log pumping of the others.
+# Stages use different resources (network / GPU / LLM API / CPU), so with several jobs in flight
+# the download of job N+1 overlaps the transcription of job N and the burn of job N-1.
+
+async def stage_prepare(job):
+    args = job["args"]
+    input_val = job["input"]
 
     # --- Directory Logic ---
     final_output_dir = args.output_dir or DEFAULTS.get("output_dir") or BASE_OUTPUT_DIR
     if not os.path.isabs(final_output_dir):
         final_output_dir = os.path.abspath(os.path.join(PROJECT_ROOT, final_output_dir))
-    
-    # Update global-like state for this run
-    effective_base_output_dir = final_output_dir
 
     # 0. Intelligent Project Naming
-    if args.input.startswith("http"):
+    if input_val.startswith("http"):
         print(f"🔍 Fetching video details...")
-        title = get_video_title(args.input, args.cookies)
+        title = await asyncio.to_thread(get_video_title, input_val, args.cookies)
         if title:
             safe_title = sanitize_filename(title)
-            workdir = os.path.join(effective_base_output_dir, safe_title)
+            workdir = os.path.join(final_output_dir, safe_title)
             print(f"📁 Project Folder: {safe_title}")
         else:
-            workdir = get_workdir(args.input, effective_base_output_dir)
+            workdir = get_workdir(input_val, final_output_dir)
     else:
-        workdir = get_workdir(args.input, effective_base_output_dir)
+        workdir = get_workdir(input_val, final_output_dir)
 
     if not os.path.exists(workdir): os.makedirs(workdir, exist_ok=True)
-    
+    job["workdir"] = workdir
+
     # --- Initialize Workflow Logging ---
-    log_path = os.path.join(workdir, "workflow.log")
-    logger = Logger(log_path)
-    sys.stdout = logger
-    sys.stderr = logger
+    job["log"] = open(os.path.join(workdir, "workflow.log"), "a", encoding="utf-8", errors="replace", buffering=LOG_BUFFER)
+    _OPEN_LOGS.add(job["log"])
+    _JOB_LOG.set(job["log"])
 
-    print(f"--- 任务启动: {args.input} ---")
+    print(f"--- 任务启动: {input_val} ---")
     print(f"🏠 [DEV MODE] Root: {PROJECT_ROOT}")
     print(f"📦 Found FFmpeg at: {FFMPEG_EXE}")
 
-    if args.input.startswith("http"):
-        video_path = download_video(args.input, workdir, args.cookies)
+    if input_val.startswith("http"):
+        video_path = await download_video(input_val, workdir, args.cookies)
     else:
         # For local files, copy them to workdir to keep project self-contained
-        src_path = os.path.abspath(args.input)
+        src_path = os.path.abspath(input_val)
         dest_path = os.path.join(workdir, os.path.basename(src_path))
         if os.path.exists(src_path):
             if os.path.abspath(src_path).lower() != os.path.abspath(dest_path).lower():
                 print(f"📂 Copying video to project folder...")
-                shutil.copy2(src_path, dest_path)
+                await asyncio.to_thread(stage_copy, src_path, dest_path)
             video_path = dest_path
         elif os.path.exists(dest_path):
             print(f"ℹ️ Original source missing, using video in project folder.")
             video_path = dest_path
         else:
             video_path = src_path # Will fail below
-            
-    if not video_path or not os.path.exists(video_path): return print("❌ Invalid input")
 
-    vid_dur = get_video_duration(video_path)
-    base = os.path.splitext(os.path.basename(video_path))[0]
+    if not video_path or not os.path.exists(video_path):
+        print("❌ Invalid input")
+        return False
+    job["video"] = video_path
+    job["base"] = os.path.splitext(os.path.basename(video_path))[0]
+    return True
+
+async def stage_transcribe(job):
+    args, workdir, base = job["args"], job["workdir"], job["base"]
+    done = _stage_ok(workdir, "transcribe", [job["video"]])
+    if done:
+        print(f"⏭️ Transcription up to date: {os.path.basename(done['src_srt'])}")
+        job["src_srt"] = done["src_srt"]
+        return True
+    vid_dur = await asyncio.to_thread(get_video_duration, job["video"])
     expected_srt = os.path.join(workdir, base + ".srt")
     expected_en = os.path.join(workdir, base + ".en.srt")
-    expected_cn = os.path.join(workdir, base + ".cn.srt")
 
-    # 1. Transcription (Sequential)
+    # 1. Transcription
     src_srt = None
     
     # Priority: 1. .srt (Transcribed) 2. .en.srt (Downloaded)
     possible_sources = [expected_srt, expected_en]
     
+    srt_utils = _srt_utils()
     for candidate in possible_sources:
         if os.path.exists(candidate) and os.path.getsize(candidate) > 500:
             if srt_utils:
                 if vid_dur > 0:
                     try:
-                        srt_dur = srt_utils.get_srt_duration(candidate)
+                        srt_dur = srt_utils.srt_fast_duration(candidate)
                         if srt_dur > vid_dur * 0.9:
                             print(f"✅ Found existing SRT: {os.path.basename(candidate)} (Duration matches)")
                             src_srt = candidate
@@ -462,20 +751,42 @@ def main():
                 break
     
     if not src_srt:
-        src_srt = transcribe_video(video_path, workdir, args.model)
+        # Pool workers share one GPU: only one of them transcribes at a time
+        if _TRANSCRIBE_LOCK is not None:
+            await asyncio.to_thread(_TRANSCRIBE_LOCK.acquire)
+        try:
+            src_srt = await transcribe_video(job["video"], workdir, args.model)
+        finally:
+            if _TRANSCRIBE_LOCK is not None:
+                _TRANSCRIBE_LOCK.release()
     
-    if not src_srt: return print("❌ Transcription failed")
-
-    # 2. Translation (Sequential)
+    if not src_srt:
+        print("❌ Transcription failed")
+        return False
+    job["src_srt"] = src_srt
+    _mark_stage(workdir, "transcribe", [job["video"]], {"src_srt": src_srt})
+    return True
+
+async def stage_translate(job):
+    args, workdir, base, src_srt = job["args"], job["workdir"], job["base"], job["src_srt"]
+    done = _stage_ok(workdir, "translate", [src_srt])
+    if done:
+        print(f"⏭️ Translation up to date: {os.path.basename(done['zh_srt'])}")
+        job.update(done)
+        return True
+
+    # 2. Translation
     zh_srt = None
+    expected_cn = os.path.join(workdir, base + ".cn.srt")
     expected_zh = os.path.join(workdir, base + ".zh.srt")
     
+    srt_utils = _srt_utils()
     for candidate_cn in [expected_cn, expected_zh]:
         if os.path.exists(candidate_cn) and os.path.getsize(candidate_cn) > 500:
             if srt_utils:
                 try:
-                    src_count = len(srt_utils.parse_srt(src_srt))
-                    zh_count = len(srt_utils.parse_srt(candidate_cn))
+                    src_count = srt_utils.srt_fast_count(src_srt)
+                    zh_count = srt_utils.srt_fast_count(candidate_cn)
                     if zh_count >= src_count * 0.95:
                         print(f"✅ Found existing translation: {os.path.basename(candidate_cn)}")
                         zh_srt = candidate_cn
@@ -487,24 +798,43 @@ def main():
                 break
 
     if not zh_srt:
-        print("🌍 Smart-translating...")
         try:
-            cmd = list(SMART_TRANSLATE_CMD) + [src_srt, "--style", args.style, "--model", args.llm_model]
-            subprocess.run(cmd, check=True)
+            if args.layout == "bilingual":
+                # Fused path: translation and merge share one interpreter and one parse
+                job["bi_srt"] = await translate_and_merge(src_srt, args.style, args.llm_model)
+            else:
+                await smart_translate(src_srt, args.style, args.llm_model)
             if os.path.exists(expected_cn): zh_srt = expected_cn
             elif os.path.exists(expected_zh): zh_srt = expected_zh
         except Exception as e:
             print(f"⚠️ Translation step error: {e}")
     
-    if not zh_srt: return print("❌ Translation failed")
+    if not zh_srt:
+        print("❌ Translation failed")
+        return False
+    job["zh_srt"] = zh_srt
+    _mark_stage(workdir, "translate", [src_srt], {"zh_srt": zh_srt})
+    return True
+
+async def stage_merge(job):
+    args, src_srt, zh_srt = job["args"], job["src_srt"], job["zh_srt"]
 
-    # 3. Merge & Burn
+    # 3. Merge
     final_srt = zh_srt
-    if args.layout == "bilingual":
+    done = _stage_ok(job["workdir"], "merge", [src_srt, zh_srt]) if args.layout == "bilingual" else None
+    if done:
+        print(f"⏭️ Bilingual merge up to date: {os.path.basename(done['final_srt'])}")
+        final_srt = done["final_srt"]
+    elif args.layout == "bilingual" and job.get("bi_srt"):
+        print(f"✅ Bilingual file produced by translate pass: {os.path.basename(job['bi_srt'])}")
+        final_srt = job["bi_srt"]
+        _mark_stage(job["workdir"], "merge", [src_srt, zh_srt], {"final_srt": final_srt})
+    elif args.layout == "bilingual":
         print(f"🔀 Merging {os.path.basename(src_srt)} and {os.path.basename(zh_srt)}...")
-        merged = merge_bilingual(src_srt, zh_srt, args.main_lang, args.llm_model)
+        merged = await merge_bilingual(src_srt, zh_srt, args.main_lang, args.llm_model)
         if merged and os.path.exists(merged):
             final_srt = merged
+            _mark_stage(job["workdir"], "merge", [src_srt, zh_srt], {"final_srt": final_srt})
         else:
             # Check if there's an existing .bi.srt anyway (maybe created but returned None due to error code)
             bi_path = src_srt[:-7] + ".bi.srt" if src_srt.lower().endswith(".en.srt") else src_srt.replace(".srt", ".bi.srt")
@@ -514,10 +844,142 @@ def main():
             else:
                 print(f"⚠️ Bilingual merge failed. Falling back to primary translation: {os.path.basename(zh_srt)}")
                 final_srt = zh_srt
-    
+    job["final_srt"] = final_srt
+    return True
+
+async def stage_burn(job):
+    args, final_srt = job["args"], job["final_srt"]
+
+    # 4. Burn
+    if args.layout == "en":
+        final_srt = job["src_srt"] # English-only burns the source track, not the translation
+    # Style options are part of the marker: changing any of them re-burns
+    style = [args.layout, args.main_lang, args.cn_font, args.en_font, args.cn_size, args.en_size, args.cn_color, args.en_color, not args.no_bg_box]
+    inputs = [job["video"], final_srt]
+    if _stage_ok(job["workdir"], "burn", inputs, style):
+        print("⏭️ Hardsub video up to date, nothing to burn.")
+        return True
     print(f"📍 Final subtitle for burning: {os.path.basename(final_srt)}", flush=True)
-    burn_subtitle(video_path, final_srt, args.layout, args.main_lang, args.cn_font, args.en_font, args.cn_size, args.en_size, args.cn_color, args.en_color, not args.no_bg_box)
+    out_video = await burn_subtitle(job["video"], final_srt, args.layout, args.main_lang, args.cn_font, args.en_font, args.cn_size, args.en_size, args.cn_color, args.en_color, not args.no_bg_box,
+                                     getattr(args, "burn_threads", None))
+    if out_video:
+        _mark_stage(job["workdir"], "burn", inputs, {"out_video": out_video}, style)
     print("✅ All done!", flush=True)
+    return True
+
+STAGES = [stage_prepare, stage_transcribe, stage_translate, stage_merge, stage_burn]
+
+LOG_BUFFER = 1 << 16
+_OPEN_LOGS = set() # workflow.log handles of in-flight jobs
+
+async def _log_flusher(interval=1.0):
+    """Flushes open job logs (and any coalesced terminal output) once per interval instead of after every write."""
+    while True:
+        await asyncio.sleep(interval)
+        try: sys.stdout.flush()
+        except: pass
+        for log_file in list(_OPEN_LOGS):
+            try: log_file.flush()
+            except: pass
+
+def _finish_job(job):
+    log_file = job.pop("log", None)
+    if log_file:
+        _OPEN_LOGS.discard(log_file)
+        log_file.close()
+
+async def _stage_worker(stage, inbox, outbox, failed):
+    """Consumes jobs from `inbox`, runs `stage` on each and forwards survivors to `outbox`."""
+    while True:
+        job = await inbox.get()
+        if job is None:
+            if outbox is not None: await outbox.put(None)
+            return
+        _JOB_LOG.set(job.get("log"))
+        try:
+            ok = await stage(job)
+        except Exception as e:
+            print(f"❌ {stage.__name__} error: {e}", flush=True)
+            ok = False
+        if not ok:
+            failed.append(job["input"])
+            _finish_job(job)
+        elif outbox is not None:
+            await outbox.put(job)
+        else:
+            _finish_job(job)
+
+async def pipeline(args, inputs):
+    """Runs every input through all STAGES with one worker coroutine per stage. Returns the failed inputs."""
+    queues = [asyncio.Queue(maxsize=2) for _ in STAGES]
+    failed = []
+    workers = [
+        asyncio.create_task(_stage_worker(stage, queues[i], queues[i + 1] if i + 1 < len(queues) else None, failed))
+        for i, stage in enumerate(STAGES)
+    ]
+    flusher = asyncio.create_task(_log_flusher())
+    for input_val in inputs:
+        await queues[0].put({"args": args, "input": input_val})
+    await queues[0].put(None)
+    await asyncio.gather(*workers)
+    flusher.cancel()
+    return failed
+
+_TRANSCRIBE_LOCK = None # multiprocessing.Lock shared by the Pool workers (None when running in one process)
+
+def _init_worker(transcribe_lock):
+    global _TRANSCRIBE_LOCK
+    _TRANSCRIBE_LOCK = transcribe_lock
+
+def process_batch(job):
+    """Runs a share of the inputs through the stage pipeline (also used as the Pool worker)."""
+    args, inputs = job
+    # Tee all output into the workflow.log of whichever job is currently printing
+    sys.stdout = Logger(sys.stdout)
+    sys.stderr = sys.stdout
+    return asyncio.run(pipeline(args, inputs))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", nargs='+', help="One or more URLs / video files")
+    parser.add_argument("--model", default="large-v3-turbo")
+    parser.add_argument("--llm-model", default="gemini-1.5-flash", help="LLM Model (gemini-1.5-flash, gpt-4o, moonshot-v1-8k, qwen-plus, glm-4, etc.)")
+    parser.add_argument("--style", default="casual")
+    parser.add_argument("--cookies")
+    parser.add_argument("--layout", default="bilingual")
+    parser.add_argument("--main-lang", default="cn")
+    parser.add_argument("--cn-font", default="KaiTi")
+    parser.add_argument("--en-font", default="Arial")
+    parser.add_argument("--cn-size", default="60")
+    parser.add_argument("--en-size", default="36")
+    parser.add_argument("--cn-color", default="Gold")
+    parser.add_argument("--en-color", default="White")
+    parser.add_argument("--no-bg-box", action="store_true")
+    parser.add_argument("--output-dir", help="Project root directory for output files")
+    args = parser.parse_args()
+
+    inputs = args.input
+    # Burns are CPU-bound ffmpeg encodes: spread the batch over processes, about one per two cores
+    workers = min(len(inputs), max(1, (os.cpu_count() or 2) // 2))
+    # Frozen builds run this script through the GUI dispatcher, where spawned children can't import it
+    if workers <= 1 or getattr(sys, 'frozen', False):
+        _prewarm_probes(inputs)
+        failed = process_batch((args, inputs))
+    else:
+        print(f"🧵 Processing {len(inputs)} inputs with {workers} worker processes...")
+        import multiprocessing
+        _prewarm_probes(inputs, wait=True)
+        # Each worker's libx264 burn gets its share of the cores instead of all of them
+        args.burn_threads = max(1, (os.cpu_count() or 2) // workers)
+        jobs = [(args, inputs[i::workers]) for i in range(workers)]
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(multiprocessing.Lock(),)) as pool:
+            failed = [f for part in pool.map(process_batch, jobs) for f in part]
+
+    if failed:
+        print(f"❌ {len(failed)} of {len(inputs)} input(s) failed: {', '.join(failed)}")
+        sys.exit(1)
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
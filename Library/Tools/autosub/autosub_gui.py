@@ -7,10 +7,10 @@ import sys
 import os
 import re
 import json
-import multiprocessing
+import collections
+import time
 import io
 import ctypes
-import io
 
 # Force UTF-8 for stdout/stderr to handle emojis in logs on Windows
 if sys.platform == "win32":
@@ -19,17 +19,46 @@ if sys.platform == "win32":
     if isinstance(sys.stderr, io.TextIOWrapper):
         sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
+def _compile_cached(path):
+    """compile() of a dispatched script, memoized in a marshal file keyed by (path, mtime_ns, size)."""
+    import marshal
+    from importlib.util import MAGIC_NUMBER
+    cache_file = os.path.join(os.path.expanduser("~"), "Documents", "AutoSub", "dispatch.pyc")
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    cache = {}
+    try:
+        with open(cache_file, "rb") as f:
+            if f.read(len(MAGIC_NUMBER)) == MAGIC_NUMBER:
+                cache = marshal.load(f)
+    except Exception: pass
+    hit = cache.get(key[0])
+    if hit and hit[:2] == key[1:]:
+        return hit[2]
+    with open(path, "rb") as f:
+        code = compile(f.read(), path, "exec")
+    cache[key[0]] = (key[1], key[2], code)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp = f"{cache_file}.{os.getpid()}.tmp" # per process: stage subprocesses may write at once
+        with open(tmp, "wb") as f:
+            f.write(MAGIC_NUMBER)
+            marshal.dump(cache, f)
+        os.replace(tmp, cache_file)
+    except Exception: pass
+    return code
+
 # Configuration
 if getattr(sys, 'frozen', False):
     # Dispatcher: If the first argument is a .py file, run it inside the frozen environment.
     # This is essential for subprocess calls to work within a single-EXE package.
     if len(sys.argv) > 1 and sys.argv[1].endswith('.py'):
         script_to_run = sys.argv[1]
-        # Shift arguments so the script sees the correct sys.argv
-        sys.argv = [sys.executable] + sys.argv[2:]
+        # Shift arguments so the script sees the correct sys.argv (argv[0] is the script, as runpy did)
+        sys.argv = [script_to_run] + sys.argv[2:]
         try:
-            import runpy
-            runpy.run_path(script_to_run, run_name="__main__")
+            code = _compile_cached(script_to_run)
+            exec(code, {"__name__": "__main__", "__file__": script_to_run, "__builtins__": __builtins__})
             sys.exit(0)
         except Exception as e:
             print(f"Error running bundled script {script_to_run}: {e}")
@@ -65,17 +94,107 @@ else:
         PROJECT_ROOT = os.path.dirname(tmp_root)
     else:
         PROJECT_ROOT = tmp_root
+    USER_DATA_DIR = PROJECT_ROOT
     ENV_PATH = os.path.join(PROJECT_ROOT, ".env")
 
 AUTOSUB_SCRIPT = os.path.join(CURRENT_DIR, "autosub.py")
+
+# Fix for Taskbar icon in Windows (process-wide, so once per process rather than per window)
+if sys.platform == "win32":
+    try:
+        myappid = 'mycompany.myproduct.subproduct.version' # arbitrary string
+        ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
+    except Exception as e:
+        print(f"Warning: Could not set AppUserModelID: {e}")
 sys.path.append(os.path.join(CURRENT_DIR, "..", "common"))
 
+# orjson is optional; stdlib json accepts/produces the same UTF-8 bytes
 try:
-    import llm_utils
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = lambda o, indent=False: orjson.dumps(o, option=orjson.OPT_INDENT_2 if indent else 0)
 except ImportError:
-    pass
+    _json_loads = lambda b: json.loads(b.decode("utf-8"))
+    _json_dumps = lambda o, indent=False: json.dumps(o, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+def _load_json(path):
+    """json.load(path) for the small config files. Returns None if missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            return _json_loads(f.read())
+    except Exception:
+        return None
+
+# Sorted system font families, so startup doesn't have to enumerate every installed font
+FONT_CACHE_FILE = os.path.join(USER_DATA_DIR, "fontcache.json")
+
+# Default CN font picked on first launch
+RESOLVED_FONTS_FILE = os.path.join(USER_DATA_DIR, "resolved.json")
+
+def _font_stamp():
+    """Changes when fonts are installed/removed (Windows build + font folder mtimes)."""
+    stamp = []
+    if sys.platform == "win32":
+        stamp.append(sys.getwindowsversion().build)
+        font_dirs = [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+                     os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts")]
+    else:
+        font_dirs = ["/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.local/share/fonts"), "/System/Library/Fonts", "/Library/Fonts"]
+    for d in font_dirs:
+        try: stamp.append(os.stat(d).st_mtime_ns)
+        except OSError: stamp.append(0)
+    return stamp
+
+def _get_font_families_cached():
+    """Returns (families, fresh). families is None when there is no cache yet."""
+    try:
+        with open(FONT_CACHE_FILE, "rb") as f:
+            data = _json_loads(f.read())
+        return data["families"], data.get("stamp") == _font_stamp()
+    except Exception:
+        return None, False
+
+def _save_font_cache(families):
+    try:
+        with open(FONT_CACHE_FILE + ".tmp", "wb") as f:
+            f.write(_json_dumps({"stamp": _font_stamp(), "families": families}))
+        os.replace(FONT_CACHE_FILE + ".tmp", FONT_CACHE_FILE)
+    except Exception: pass
+
+# KEY=VALUE lines of the .env (comments skipped, surrounding whitespace trimmed)
+_ENV_RE = re.compile(rb"^[ \t]*([^#\s=][^=\r\n]*?)[ \t]*=[ \t]*(.*?)[ \t\r]*$", re.M)
+
+# llm_utils (imported lazily now) used to load the .env on import; the GUI reads keys from
+# os.environ before any worker imports it, so load it here without overriding real env vars
+try:
+    with open(ENV_PATH, "rb") as _f:
+        for _k, _v in _ENV_RE.findall(_f.read()):
+            os.environ.setdefault(_k.decode("utf-8", "replace"), _v.decode("utf-8", "replace").strip("'\""))
+except OSError: pass
+
+# Log-line classification, compiled once
+_PCT_RE = re.compile(r"(\d+\.?\d*)%")
+# Stage banners printed by autosub.py and the progress bar value each one jumps to
+_EMOJI_TO_PCT = {"🎬": 5, "🎙️": 10, "🌍": 80, "🔥": 90}
+
+def _is_progress(message):
+    return message.find("Progress:") >= 0 or (message.find("[download]") >= 0 and message.find("%") >= 0)
+
+def _stage_pct(message):
+    return next((p for e, p in _EMOJI_TO_PCT.items() if e in message), None)
 
 class AutoSubGUI:
+    # Map vendor_id to env key
+    _ENV_MAP = {
+        "gemini": "GEMINI_API_KEY",
+        "openai": "OPENAI_API_KEY",
+        "moonshot": "MOONSHOT_API_KEY",
+        "dashscope": "DASHSCOPE_API_KEY",
+        "zhipu": "ZHIPUAI_API_KEY",
+        "deepseek": "DEEPSEEK_API_KEY",
+        "siliconflow": "SILICONFLOW_API_KEY"
+    }
+
     def __init__(self, root):
         self.root = root
         self.root.title("AutoSub - 自动视频字幕生成工具 (Pro)")
@@ -85,9 +204,6 @@ class AutoSubGUI:
         if os.path.exists(icon_path):
             try:
                 self.root.iconbitmap(icon_path)
-                # Fix for Taskbar icon in Windows
-                myappid = 'mycompany.myproduct.subproduct.version' # arbitrary string
-                ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
             except Exception as e:
                 print(f"Warning: Could not set icon: {e}")
         self.root.geometry("650x650")
@@ -97,7 +213,16 @@ class AutoSubGUI:
         style.configure("TButton", font=("Microsoft YaHei", 9))
 
         self.settings = {}
-        self.last_was_progress = False
+        # vendor_id -> (models, fetched_at) / LLMClient, so flipping the vendor combobox doesn't refetch
+        self._model_cache = {}
+        self._client_cache = {}
+        # Vendor switches are debounced; only the newest model fetch may update the UI
+        self._vendor_change_after_id = None
+        self._vendor_req_seq = 0
+        self._progress_open = False # the log's last line is a progress tick (rewritten in place)
+        # Last rendered progress value / time, for throttling progress bar redraws
+        self._last_pct = -1.0
+        self._last_pct_ts = 0.0
         # 1. Load factory defaults
         if getattr(sys, 'frozen', False):
             # When frozen, look in the App Root (where .exe is) for visibility
@@ -109,11 +234,7 @@ class AutoSubGUI:
         else:
             defaults_file = os.path.join(CURRENT_DIR, "defaults.json")
 
-        if os.path.exists(defaults_file):
-            try:
-                with open(defaults_file, "r", encoding="utf-8") as f:
-                    self.settings.update(json.load(f))
-            except Exception: pass
+        self.settings.update(_load_json(defaults_file) or {})
 
         # 2. Load user settings (overrides)
         # Check Project Root (Documents/AutoSub) first, then App Root
@@ -122,11 +243,7 @@ class AutoSubGUI:
             settings_locations.append(os.path.join(os.path.dirname(sys.executable), "settings.json"))
 
         for settings_file in settings_locations:
-            if os.path.exists(settings_file):
-                try:
-                    with open(settings_file, "r", encoding="utf-8") as f:
-                        self.settings.update(json.load(f))
-                except Exception: pass
+            self.settings.update(_load_json(settings_file) or {})
 
         
         # --- Input Section ---
@@ -221,36 +338,55 @@ class AutoSubGUI:
         ttk.Combobox(style_frame, textvariable=self.main_lang_var, values=["cn", "en"], width=8, state="readonly").grid(row=0, column=3, sticky="w", padx=5)
         
         # Row 1: Font
-        # Row 1: Font
-        # Get System Fonts
-        try:
-            self.available_fonts = sorted(list(set(font.families())))
-        except:
-            self.available_fonts = ["Arial", "Microsoft YaHei", "SimHei", "KaiTi", "Times New Roman"]
+        # Get System Fonts (from fontcache.json when possible; enumerating is slow with many fonts installed)
+        cached_fonts, fonts_fresh = _get_font_families_cached()
+        if cached_fonts:
+            self.available_fonts = cached_fonts
+            if not fonts_fresh:
+                # Tk isn't thread-safe, so re-enumerate on the main thread once the window is up
+                self.root.after(1000, self._refresh_font_cache)
+        else:
+            try:
+                self.available_fonts = sorted(set(font.families()))
+                _save_font_cache(self.available_fonts)
+            except:
+                self.available_fonts = ["Arial", "Microsoft YaHei", "SimHei", "KaiTi", "Times New Roman"]
 
         # Keep map mainly for legacy manual aliases if any, but now we prefer system names
         self.font_map_cn = {"楷体": "KaiTi", "微软雅黑": "Microsoft YaHei", "黑体": "SimHei", "宋体": "SimSun", "仿宋": "FangSong"}
 
         tk.Label(style_frame, text="中文字体:").grid(row=1, column=0, sticky="w", pady=2)
-        # Default to STKaiti (华文楷体) if available, then KaiTi, else Microsoft YaHei
-        target_font_cn = "STKaiti" # 华文楷体
-        if target_font_cn not in self.available_fonts:
-             # Try Chinese name if English name not found
-             if "华文楷体" in self.available_fonts: target_font_cn = "华文楷体"
-             elif "KaiTi" in self.available_fonts: target_font_cn = "KaiTi"
-             elif "Microsoft YaHei" in self.available_fonts: target_font_cn = "Microsoft YaHei"
-             else: target_font_cn = self.available_fonts[0]
+        # O(1) membership for the default-font probes below
+        self.available_fonts_set = frozenset(self.available_fonts)
+        resolved = _load_json(RESOLVED_FONTS_FILE) or {}
+        target_font_cn = resolved.get("cn_font")
+        if target_font_cn not in self.available_fonts_set:
+            # Default to STKaiti (华文楷体) if available, then KaiTi, else Microsoft YaHei
+            target_font_cn = "STKaiti" # 华文楷体
+            if target_font_cn not in self.available_fonts_set:
+                 # Try Chinese name if English name not found
+                 if "华文楷体" in self.available_fonts_set: target_font_cn = "华文楷体"
+                 elif "KaiTi" in self.available_fonts_set: target_font_cn = "KaiTi"
+                 elif "Microsoft YaHei" in self.available_fonts_set: target_font_cn = "Microsoft YaHei"
+                 else: target_font_cn = self.available_fonts[0]
+            # Remember the probe result so later launches skip it
+            try:
+                with open(RESOLVED_FONTS_FILE, "wb") as f:
+                    f.write(_json_dumps({"cn_font": target_font_cn}))
+            except: pass
 
         default_cn = target_font_cn
         
         self.cn_font_var = tk.StringVar(value=self.settings.get("cn_font", default_cn))
-        ttk.Combobox(style_frame, textvariable=self.cn_font_var, values=self.available_fonts, width=20, state="readonly").grid(row=1, column=1, padx=5)
+        self.cn_font_combo = ttk.Combobox(style_frame, textvariable=self.cn_font_var, values=self.available_fonts, width=20, state="readonly")
+        self.cn_font_combo.grid(row=1, column=1, padx=5)
         
         tk.Label(style_frame, text="英文字体:").grid(row=1, column=2, sticky="w", padx=10)
-        default_en = "Arial" if "Arial" in self.available_fonts else self.available_fonts[0]
+        default_en = "Arial" if "Arial" in self.available_fonts_set else self.available_fonts[0]
         self.en_font_var = tk.StringVar(value=self.settings.get("en_font", default_en))
         # Changed Entry to Combobox
-        ttk.Combobox(style_frame, textvariable=self.en_font_var, values=self.available_fonts, width=20, state="readonly").grid(row=1, column=3, padx=5)
+        self.en_font_combo = ttk.Combobox(style_frame, textvariable=self.en_font_var, values=self.available_fonts, width=20, state="readonly")
+        self.en_font_combo.grid(row=1, column=3, padx=5)
         
         # Row 2: Size
         tk.Label(style_frame, text="中文大小:").grid(row=2, column=0, sticky="w", pady=2)
@@ -287,13 +423,22 @@ class AutoSubGUI:
         self.status_label.pack(fill="x")
         
         # Text with Scrollbar
-        self.log_text = tk.Text(log_frame, height=8, state="disabled", font=("Consolas", 9))
+        self.log_text = tk.Text(log_frame, height=8, font=("Consolas", 9))
+        # Append-only: the widget stays in "normal" state (no state flip per write) and keyboard
+        # edits are swallowed; Ctrl+C / Ctrl+A still reach the class bindings so copying works
+        self.log_text.bind("<Key>", lambda e: None if (e.state & 0x4 and e.keysym.lower() in ("c", "a")) else "break")
+        for seq in ("<<Paste>>", "<<Cut>>", "<<PasteSelection>>"):
+            self.log_text.bind(seq, lambda e: "break")
         self.log_scroll = ttk.Scrollbar(log_frame, orient="vertical", command=self.log_text.yview)
         
         self.log_text.configure(yscrollcommand=self.log_scroll.set)
         
         self.log_scroll.pack(side="right", fill="y")
         self.log_text.pack(side="left", fill="both", expand=True)
+
+        # Reader thread appends lines here; one repeating after() tick renders them in a batch
+        self._log_queue = collections.deque()
+        self.root.after(50, self._drain_log)
         
         # --- Actions ---
         action_frame = ttk.Frame(root, padding=10)
@@ -335,42 +480,98 @@ class AutoSubGUI:
         if dirname: self.output_dir_var.set(dirname)
 
     def log_clear(self):
-        self.log_text.config(state="normal")
         self.log_text.delete(1.0, "end")
-        self.log_text.config(state="disabled")
+        self._progress_open = False
+
+    def _refresh_font_cache(self):
+        try:
+            families = sorted(set(font.families()))
+        except:
+            return
+        _save_font_cache(families)
+        if families != self.available_fonts:
+            self.available_fonts = families
+            self.available_fonts_set = frozenset(families)
+            self.cn_font_combo.configure(values=families)
+            self.en_font_combo.configure(values=families)
+
+    def _drain_log(self):
+        if self._log_queue:
+            lines = []
+            while self._log_queue:
+                lines.append(self._log_queue.popleft())
+            self.log_lines(lines)
+        self.root.after(50, self._drain_log)
 
     def log(self, message):
-        self.log_text.config(state="normal")
-        
-        # If the last line was a Progress update and this one is too, replace it instead of appending
-        is_progress = "Progress:" in message or ("[download]" in message and "%" in message)
-        if is_progress and getattr(self, "last_was_progress", False):
-            # Delete the last line. "end-1c" is the character before the very end (the last newline)
-            # "end-2l" goes back to the start of the line before the last one.
-            self.log_text.delete("end-2l", "end-1c")
-        
-        self.log_text.insert("end", message + "\n")
-        self.last_was_progress = is_progress
-        
-        self.log_text.see("end")
-        self.log_text.config(state="disabled")
-        
+        self.log_lines([message])
+
+    def log_lines(self, messages):
+        """
+        Renders a batch of log lines. Consecutive regular lines go in with one Text insert; a run
+        of progress ticks only rewrites the single "progress" line with the newest one.
+        """
+        pending = []
+        tick = None
+        status_msg = None
+        for message in messages:
+            if _is_progress(message):
+                tick = status_msg = message
+                continue
+            if tick is not None:
+                self._append_log(pending)
+                self._show_progress_line(tick)
+                pending, tick = [], None
+            pending.append(message)
+            if _stage_pct(message) is not None:
+                status_msg = message # Only the latest one is visible anyway
+        
+        self._append_log(pending)
+        if tick is not None:
+            self._show_progress_line(tick)
+        if pending or tick is not None:
+            self.log_text.see("end")
+        if status_msg is not None:
+            self.update_status(status_msg)
+
+    def _append_log(self, lines):
+        if lines:
+            self.log_text.insert("end", "\n".join(lines) + "\n")
+            self._progress_open = False
+
+    def _show_progress_line(self, message):
+        """Overwrites the progress line in place while it is the last line, else starts a new one."""
+        if self._progress_open:
+            self.log_text.delete("progress_start", "end-1c")
+        else:
+            self.log_text.mark_set("progress_start", "end-1c")
+            self.log_text.mark_gravity("progress_start", "left")
+        self.log_text.insert("end", message + "\n", "progress")
+        self._progress_open = True
+
+    def update_status(self, message):
+        is_progress = _is_progress(message)
         # Parse progress
         # Expected: Progress: 12.3% (00:01:23,456 / 00:10:00,000)
         # Or: [download]  12.3% of 100MiB ...
         if is_progress:
             try:
-                pct_match = re.search(r"(\d+\.?\d*)%", message)
+                pct_match = _PCT_RE.search(message)
                 if pct_match:
-                    self.progress_var.set(float(pct_match.group(1)))
-                    self.status_label.config(text=message.strip())
+                    pct = float(pct_match.group(1))
+                    now = time.monotonic()
+                    # Cap progress redraws at ~30 Hz; always show completion and restarts (next file)
+                    if now - self._last_pct_ts >= 0.033 or pct >= 100 or pct < self._last_pct:
+                        self._last_pct, self._last_pct_ts = pct, now
+                        self.progress_var.set(pct)
+                        self.status_label.config(text=message.strip())
             except: pass
-        elif "🎬" in message or "🎙️" in message or "🌍" in message or "🔥" in message:
-             self.status_label.config(text=message.strip())
-             if "🎬" in message: self.progress_var.set(5)
-             if "🎙️" in message: self.progress_var.set(10)
-             if "🌍" in message: self.progress_var.set(80)
-             if "🔥" in message: self.progress_var.set(90)
+        else:
+            hit = _stage_pct(message)
+            if hit is not None:
+                self.status_label.config(text=message.strip())
+                self.progress_var.set(hit)
+                self._last_pct = -1.0
 
     def start_process(self):
         input_val = self.input_var.get()
@@ -378,41 +579,39 @@ class AutoSubGUI:
             messagebox.showerror("错误", "请输入视频链接或文件")
             return
             
-        self.start_btn.config(state="disabled", text="处理中...")
         self.start_btn.config(state="disabled", text="处理中...")
         self.log_clear()
         self.log(f"--- 任务启动: {input_val} ---")
         self.progress_var.set(0)
         
-        cmd = [sys.executable, AUTOSUB_SCRIPT, input_val]
-        cmd.extend(["--model", self.model_var.get()])
-        cmd.extend(["--llm-model", self.llm_model_var.get()])
-        cmd.extend(["--style", self.style_var.get()])
-        
-        # Advanced Layout Args
-        cmd.extend(["--layout", self.layout_var.get()])
-        cmd.extend(["--main-lang", self.main_lang_var.get()])
-        
         # Format font name from Chinese label to English ID for ASS compatibility if needed
         cn_font = self.cn_font_var.get()
         real_cn_font = self.font_map_cn.get(cn_font, cn_font)
         
-        cmd.extend(["--cn-font", real_cn_font])
-        cmd.extend(["--en-font", self.en_font_var.get()])
-        cmd.extend(["--cn-size", self.cn_size_var.get()])
-        cmd.extend(["--en-size", self.en_size_var.get()])
-        cmd.extend(["--cn-color", self.cn_color_var.get()])
-        cmd.extend(["--en-color", self.en_color_var.get()])
+        cmd = [sys.executable, AUTOSUB_SCRIPT, input_val,
+               "--model", self.model_var.get(),
+               "--llm-model", self.llm_model_var.get(),
+               "--style", self.style_var.get(),
+               # Advanced Layout Args
+               "--layout", self.layout_var.get(),
+               "--main-lang", self.main_lang_var.get(),
+               "--cn-font", real_cn_font,
+               "--en-font", self.en_font_var.get(),
+               "--cn-size", self.cn_size_var.get(),
+               "--en-size", self.en_size_var.get(),
+               "--cn-color", self.cn_color_var.get(),
+               "--en-color", self.en_color_var.get()]
         
         if not self.bg_box_var.get():
             cmd.append("--no-bg-box")
         
         if self.cookies_var.get():
-            cmd.extend(["--cookies", self.cookies_var.get()])
+            cmd += ["--cookies", self.cookies_var.get()]
             
         if self.output_dir_var.get():
-            cmd.extend(["--output-dir", self.output_dir_var.get()])
+            cmd += ["--output-dir", self.output_dir_var.get()]
             
+        # Daemon threads: a reader blocked on a pipe still held by orphaned children can't keep the GUI alive
         threading.Thread(target=self.run_subprocess, args=(cmd,), daemon=True).start()
 
     def run_subprocess(self, cmd):
@@ -423,12 +622,30 @@ class AutoSubGUI:
             env["PYTHONUNBUFFERED"] = "1"
             
             # Store process ref for killing
-            self.current_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace', env=env, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+            self.current_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0, env=env, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
             process = self.current_process
+            if sys.platform.startswith("linux"):
+                # Grow the pipe to 1 MiB so bursty output doesn't stall the child between our reads
+                try:
+                    import fcntl
+                    fcntl.fcntl(process.stdout.fileno(), getattr(fcntl, "F_SETPIPE_SZ", 1031), 1 << 20)
+                except OSError: pass
             
-            for line in process.stdout:
-                msg = line.strip()
-                self.root.after(0, self.log, msg)
+            # Drain the raw pipe in 64 KiB reads and decode once per chunk; complete lines are
+            # queued and rendered in batches by _drain_log
+            fd = process.stdout.fileno()
+            tail = b""
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk: break
+                data = tail + chunk
+                cut = data.rfind(b"\n") + 1
+                tail = data[cut:]
+                if cut:
+                    self._log_queue.extend(line.strip() for line in data[:cut].decode('utf-8', 'replace').splitlines())
+            if tail:
+                self._log_queue.append(tail.decode('utf-8', 'replace').strip())
+            process.stdout.close()
                 
             process.wait()
             
@@ -441,26 +658,23 @@ class AutoSubGUI:
                 self.root.after(0, lambda: messagebox.showerror("错误", "任务失败，请检查日志"))
                 
         except Exception as e:
-            self.root.after(0, self.log, f"System Error: {e}")
+            self._log_queue.append(f"System Error: {e}")
         finally:
             self.root.after(0, lambda: self.start_btn.config(state="normal", text="开始处理 (Start Process)"))
 
 
     def on_vendor_change(self, event):
+        # Coalesce rapid combobox changes (e.g. arrowing through vendors) into one fetch
+        if self._vendor_change_after_id:
+            self.root.after_cancel(self._vendor_change_after_id)
+        self._vendor_change_after_id = self.root.after(250, self._do_vendor_change)
+
+    def _do_vendor_change(self):
+        self._vendor_change_after_id = None
         vendor_name = self.vendor_var.get()
         vendor_id = self.vendor_display_map[vendor_name]
         
-        # Map vendor_id to env key
-        env_map = {
-            "gemini": "GEMINI_API_KEY",
-            "openai": "OPENAI_API_KEY",
-            "moonshot": "MOONSHOT_API_KEY",
-            "dashscope": "DASHSCOPE_API_KEY",
-            "zhipu": "ZHIPUAI_API_KEY",
-            "deepseek": "DEEPSEEK_API_KEY",
-            "siliconflow": "SILICONFLOW_API_KEY"
-        }
-        env_key = env_map[vendor_id]
+        env_key = self._ENV_MAP[vendor_id]
         
         current_key = os.environ.get(env_key, "")
         self.api_key_var.set(current_key)
@@ -471,25 +685,38 @@ class AutoSubGUI:
             self.llm_model_var.set("正在获取模型...")
             
         self.llm_combo.config(state="disabled")
-        threading.Thread(target=self.fetch_models_for_vendor, args=(vendor_id, env_key), daemon=True).start()
+        self._vendor_req_seq += 1
+        # An older fetch still in flight is left to finish; the seq check drops its result
+        threading.Thread(target=self.fetch_models_for_vendor, args=(vendor_id, env_key, self._vendor_req_seq), daemon=True).start()
 
-    def fetch_models_for_vendor(self, vendor_id, env_key):
+    MODEL_CACHE_TTL = 600 # seconds
+
+    def fetch_models_for_vendor(self, vendor_id, env_key, seq=None):
+        cached = self._model_cache.get(vendor_id)
+        if cached and time.time() - cached[1] < self.MODEL_CACHE_TTL:
+            self.root.after(0, lambda: self.update_model_ui(cached[0], True, seq=seq))
+            return
         try:
             from llm_utils import LLMProvider, LLMClient
             provider = LLMProvider(vendor_id)
-            client = LLMClient() # Will use existing env vars
+            client = self._client_cache.get(vendor_id)
+            if client is None:
+                client = self._client_cache[vendor_id] = LLMClient() # Will use existing env vars
             
             models = client.list_models_by_provider(provider)
             
             if models:
-                 self.root.after(0, lambda: self.update_model_ui(models, True))
+                 self._model_cache[vendor_id] = (models, time.time())
+                 self.root.after(0, lambda: self.update_model_ui(models, True, seq=seq))
             else:
                  msg = "缺少 Key" if not os.environ.get(env_key) else "无可获取模型"
-                 self.root.after(0, lambda: self.update_model_ui([], False, msg))
+                 self.root.after(0, lambda: self.update_model_ui([], False, msg, seq))
         except Exception as e:
-            self.root.after(0, lambda: self.update_model_ui([], False, "连接失败"))
+            self.root.after(0, lambda: self.update_model_ui([], False, "连接失败", seq))
 
-    def update_model_ui(self, models, success, error_msg=""):
+    def update_model_ui(self, models, success, error_msg="", seq=None):
+        if seq is not None and seq != self._vendor_req_seq:
+            return # A newer vendor selection superseded this fetch
         if success:
             self.llm_combo.config(state="readonly", values=models)
             current = self.llm_model_var.get()
@@ -526,16 +753,7 @@ class AutoSubGUI:
         vendor_id = self.vendor_display_map[vendor_name]
         key = self.api_key_var.get().strip()
         
-        env_map = {
-            "gemini": "GEMINI_API_KEY",
-            "openai": "OPENAI_API_KEY",
-            "moonshot": "MOONSHOT_API_KEY",
-            "dashscope": "DASHSCOPE_API_KEY",
-            "zhipu": "ZHIPUAI_API_KEY",
-            "deepseek": "DEEPSEEK_API_KEY",
-            "siliconflow": "SILICONFLOW_API_KEY"
-        }
-        env_key = env_map[vendor_id]
+        env_key = self._ENV_MAP[vendor_id]
         
         self.save_api_keys({env_key: key})
             
@@ -591,29 +809,32 @@ class AutoSubGUI:
                 if v: os.environ[k] = v
             
             # 2. Write to .env
-            lines = []
+            data = b""
             if os.path.exists(ENV_PATH):
-                with open(ENV_PATH, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
+                with open(ENV_PATH, 'rb') as f:
+                    data = f.read()
             
-            # Key value map for replacement
-            current_config = {}
-            for line in lines:
-                if '=' in line and not line.startswith('#'):
-                    k, v = line.split('=', 1)
-                    current_config[k.strip()] = v.strip()
+            # Key value map for replacement (one regex pass over the whole file)
+            current_config = dict(_ENV_RE.findall(data))
             
             # Update with new keys
-            for k, v in keys_dict.items():
-                if v: current_config[k] = v
+            current_config.update({k.encode('utf-8'): v.encode('utf-8') for k, v in keys_dict.items() if v})
                 
-            # Reconstruct .env
-            with open(ENV_PATH, 'w', encoding='utf-8') as f:
-                for k, v in current_config.items():
-                    f.write(f"{k}={v}\n")
+            # Reconstruct .env (skip the write when nothing changed, e.g. re-saving the same key)
+            new_data = b"".join(k + b"=" + v + b"\n" for k, v in current_config.items())
+            if new_data != data:
+                with open(ENV_PATH, 'wb') as f:
+                    f.write(new_data)
                 
             # Reload clients
-            llm_utils._CLIENT = None
+            # llm_utils is imported lazily; if it isn't loaded yet there is no cached client to drop
+            llm_utils = sys.modules.get("llm_utils")
+            if llm_utils: llm_utils._CLIENT = None
+            # Only vendors whose key was saved need a fresh client / model list
+            for vendor_id, env_key in self._ENV_MAP.items():
+                if keys_dict.get(env_key):
+                    self._client_cache.pop(vendor_id, None)
+                    self._model_cache.pop(vendor_id, None)
                
             messagebox.showinfo("成功", "API Keys 已保存并更新配置！")
             
@@ -632,8 +853,8 @@ class AutoSubGUI:
         
         settings_file = os.path.join(PROJECT_ROOT, "settings.json")
         try:
-            with open(settings_file, "w", encoding="utf-8") as f:
-                json.dump(self.settings, f, indent=4, ensure_ascii=False)
+            with open(settings_file, "wb") as f:
+                f.write(_json_dumps(self.settings, indent=True))
             messagebox.showinfo("成功", f"默认配置已保存：\n厂商：{self.settings['llm_vendor']}\n模型：{self.settings['llm_model']}")
         except Exception as e:
             messagebox.showerror("错误", f"保存失败: {e}")
@@ -677,6 +898,7 @@ class AutoSubGUI:
             self.root.after(0, lambda: self.test_btn.config(state="normal", text="测试连接"))
 
 if __name__ == "__main__":
+    import multiprocessing
     multiprocessing.freeze_support()
     root = tk.Tk()
     app = AutoSubGUI(root)
@@ -2,6 +2,10 @@
 import os
 import sys
 import re
+import itertools
+import collections
+import concurrent.futures
+import time
 
 # Add paths to tools
 TOOLS_DIR = r"d:\cc\Library\Tools"
@@ -21,6 +25,13 @@ if not GEMINI_KEY:
 import google.generativeai as genai
 genai.configure(api_key=GEMINI_KEY)
 
+# Chunks are translated concurrently (network-bound), capped by worker count and RPM
+MAX_WORKERS = int(os.environ.get("FINISH_MANUAL_WORKERS", "8"))
+MAX_RETRIES = 5
+sys.path.append(os.path.join(TOOLS_DIR, "common"))
+from llm_utils import RateLimiter
+limiter = RateLimiter(int(os.environ.get("FINISH_MANUAL_RPM", "15")))
+
 def translate_content(content):
     prompt = f"""
 Translate the following English subtitles (SRT format) into Simplified Chinese.
@@ -35,33 +46,57 @@ Subtitle Content:
 {content}
 """
     model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content(prompt)
-    return response.text.strip()
+    # Quota errors (429) back off exponentially and retry; anything else fails the run as before
+    for attempt in range(MAX_RETRIES):
+        limiter.wait()
+        try:
+            response = model.generate_content(prompt)
+            return response.text.strip()
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1 or not ("429" in str(e) or "quota" in str(e).lower() or "exhausted" in str(e).lower()):
+                raise
+            delay = 2 ** attempt * 5
+            print(f"  ⏳ Rate limited, retrying in {delay}s...")
+            time.sleep(delay)
+
+# Strips a markdown code fence the model sometimes wraps around its answer
+_MD_RE = re.compile(r"^```\w*\n|\n```$")
+
+def probe_encoder():
+    """Finds FFmpeg and dry-runs the hardware encoder (what burn_engine does before every burn)."""
+    sys.path.append(os.path.join(TOOLS_DIR, "hardsubber"))
+    import burn_engine
+    return burn_engine.get_optimized_encoder(burn_engine.FFMPEG_PATH)[0]
+
+# The burn can't start before the last chunk is translated, but its encoder probe can:
+# run it in the background now and hand the result to burn_engine via --encoder.
+probe_ex = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+encoder_future = probe_ex.submit(probe_encoder)
 
 print("🌍 Translating SRT...")
-with open(srt_path, "r", encoding="utf-8") as f:
-    full_content = f.read()
-
-# For very large files, we might need to chunk. 100k characters is usually fine for one shot if it's SRT.
-# Total lines: 4749, Total bytes: 98,762. This should fit in one or two goes.
-# Let's chunk every 1000 lines just to be safe and avoid hitting output limits.
-lines = full_content.splitlines()
+# Chunk every 1000 lines to avoid hitting output limits. The input is read lazily and at most
+# MAX_WORKERS chunks are in flight; results are written in order as soon as the head one is done.
 chunk_size = 1000
-chunks = [lines[i:i + chunk_size] for i in range(0, len(lines), chunk_size)]
-
-translated_chunks = []
-for i, chunk in enumerate(chunks):
-    print(f"  Chunk {i+1}/{len(chunks)}...")
-    chunk_text = "\n".join(chunk)
-    translated = translate_content(chunk_text)
-    # Cleanup markdown
-    translated = re.sub(r"^```\w*\n", "", translated)
-    translated = re.sub(r"\n```$", "", translated)
-    translated_chunks.append(translated)
-
 zh_srt_path = srt_path.replace(".srt", ".zh.srt")
-with open(zh_srt_path, "w", encoding="utf-8") as f:
-    f.write("\n".join(translated_chunks))
+with open(srt_path, "r", encoding="utf-8") as src, open(zh_srt_path, "w", encoding="utf-8") as out, \
+        concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+    pending = collections.deque()
+    written = 0
+    eof = False
+    while pending or not eof:
+        while not eof and len(pending) < MAX_WORKERS:
+            chunk = list(itertools.islice(src, chunk_size))
+            if not chunk:
+                eof = True
+                break
+            pending.append(ex.submit(translate_content, "".join(chunk).rstrip("\n")))
+            print(f"  Chunk {written + len(pending)} submitted...")
+        if pending:
+            translated = _MD_RE.sub("", pending.popleft().result())
+            if written: out.write("\n")
+            out.write(translated)
+            written += 1
+            print(f"  Chunk {written} done.")
 
 print(f"✅ Translated SRT saved: {zh_srt_path}")
 
@@ -84,6 +119,12 @@ subprocess.run(list(SRT2ASS_CMD) + [bi_srt_path, ass_path, "--layout", "bilingua
 
 out_video = video_path.replace(".mp4", "_hardsub.mp4")
 print("🔥 Burning...")
-subprocess.run(list(BURNSUB_CMD) + [video_path, ass_path, out_video], check=True, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+try:
+    encoder_args = ["--encoder", encoder_future.result()]
+except Exception as e:
+    print(f"  ⚠️ Encoder probe failed ({e}), burn_engine will detect it itself.")
+    encoder_args = []
+probe_ex.shutdown()
+subprocess.run(list(BURNSUB_CMD) + [video_path, ass_path, out_video] + encoder_args, check=True, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
 
 print(f"✨ ALL DONE! Video saved at: {out_video}")
@@ -2,9 +2,10 @@
 import os
 import sys
 import argparse
-import math
 import time
 import re
+import json
+import functools
 from typing import List, Dict
 import io
 
@@ -45,23 +46,39 @@ except ImportError as e:
 
 # --- SKILL INTEGRATION ---
 
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+@functools.lru_cache(maxsize=16)
+def _read_skill_rules(readme_path, mtime):
+    if mtime is None:
+        return ""
+    with open(readme_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 def load_skill_rules(tool_name):
     """
     Reads the README/SKILL.md of a tool to extract prompting rules.
+    Memoized per (path, mtime), so repeated calls only re-read an edited file.
     """
-    skill_dir = os.path.join(TOOLS_DIR, tool_name)
-    readme_path = os.path.join(skill_dir, "README.md")
-    content = ""
-    if os.path.exists(readme_path):
-        with open(readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    return content
+    readme_path = os.path.join(TOOLS_DIR, tool_name, "README.md")
+    return _read_skill_rules(readme_path, _mtime(readme_path))
 
 # Load rules once at startup
 HUMANIZER_RULES = load_skill_rules("humanizer-zh")
 VERBALIZER_RULES = load_skill_rules("verbalizer")
 SUBTRANSLATOR_RULES = load_skill_rules("subtranslator")
 
+# Prompt snippets, cut once here instead of per chunk
+_VERB_SNIPPET = VERBALIZER_RULES[:1500] if VERBALIZER_RULES else "Translate naturally."
+_HUM_SNIPPET = HUMANIZER_RULES[:1500] if HUMANIZER_RULES else "Do not sound robotic."
+# Domain Knowledge section of the subtranslator README, if present
+_KNOWLEDGE_MATCH = re.search(r'(## Domain Knowledge & ASR Correction.*)', SUBTRANSLATOR_RULES, re.DOTALL)
+_KNOWLEDGE_SNIPPET = _KNOWLEDGE_MATCH.group(1).strip() if _KNOWLEDGE_MATCH else ""
+
 
 
 # Retrieve API Keys from environment
@@ -86,30 +103,45 @@ def get_context_window(blocks: List[Dict], index: int, window_size: int = 2) ->
     
     return {"prev": prev_text, "next": next_text}
 
+# "[ID] text" lines of a model response, in one scan (same as strip + match per line;
+# [ \t] instead of \s so a match never runs into the next line)
+_RESP_RE = re.compile(r'^\s*\[(\d+)\][ \t]*(.*?)\s*$', re.MULTILINE)
+
+def _format_input(ids, texts, head="", tail=""):
+    """head + one "[ID] text" line per block + tail, written into a single buffer."""
+    buf = io.StringIO()
+    buf.write(head)
+    for idx, text in zip(ids, texts):
+        buf.write('[')
+        buf.write(idx)
+        buf.write('] ')
+        buf.write(text)
+        buf.write('\n')
+    buf.write(tail)
+    return buf.getvalue()
+
 def smart_translate_chunk(chunk_blocks: List[Dict], style: str = "casual", model_name: str = "gemini-1.5-flash") -> List[Dict]:
     """
     Translates a chunk of subtitle blocks using context-aware prompting.
     """
     # Construct the Prompt
-    input_text = ""
-    for i, block in enumerate(chunk_blocks):
-        # We simplify the input to line format: [ID] Text
-        text = " ".join(block['lines']).replace("\n", " ")
-        input_text += f"[{block['index']}] {text}\n"
+    # We simplify the input to line format: [ID] Text
+    input_text = _format_input([str(b['index']) for b in chunk_blocks],
+                               [" ".join(b['lines']).replace("\n", " ") for b in chunk_blocks])
 
     prompt = f"""
 You are an expert subtitle translator and editor.
 Translate the following English subtitles into Simplified Chinese.
 
 ### STEP 1: VERBALIZATION (Tone & Persona)
-{VERBALIZER_RULES[:1500]}... (Truncated for brevity)
+{_VERB_SNIPPET}... (Truncated for brevity)
 TARGET STYLE: {style}
 - "Casual": Natural, spoken Chinese. Use "其实", "也就是说".
 - "Tech": Accurate terminology. "Code" -> "代码", "Agent" -> "智能体".
 - "Edgy": Short, punchy, impactful.
 
 ### STEP 2: HUMANIZATION (De-AI)
-{HUMANIZER_RULES[:1500]}... (Truncated for brevity)
+{_HUM_SNIPPET}... (Truncated for brevity)
 - NO "translationese".
 - NO "此外", "意味着", "不可或缺".
 - NO long dashes "——".
@@ -120,7 +152,9 @@ TARGET STYLE: {style}
 - If a sentence is split across lines, translate the PARTIAL meaning naturaly for that time slot.
 
 INPUT BLOCK:
-{input_text}
+"""
+    # Instructions go as the prefix so the semantic cache keys on the block, not the preamble
+    payload = f"""{input_text}
 
 OUTPUT FORMAT:
 [ID] Translated Text
@@ -128,18 +162,12 @@ OUTPUT FORMAT:
 """
     
     try:
-        translated_text = client.generate_content(prompt, model_name=model_name)
+        translated_text = client.generate_content(payload, model_name=model_name, prompt_prefix=prompt)
         if not translated_text:
             return chunk_blocks
             
         # Parse the Output
-        translated_map = {}
-        for line in translated_text.split('\n'):
-            match = re.match(r'\[(\d+)\]\s*(.*)', line.strip())
-            if match:
-                idx = match.group(1)
-                content = match.group(2).strip()
-                translated_map[idx] = content
+        translated_map = {m.group(1): m.group(2) for m in _RESP_RE.finditer(translated_text)}
         
         # Apply translations back to blocks
         translated_blocks = []
@@ -164,6 +192,10 @@ OUTPUT FORMAT:
 STYLE_GUIDE_PATH = os.path.join(TOOLS_DIR, "common", "STYLE_GUIDE.md")
 
 def load_regex_rules(filepath):
+    return list(_parse_regex_rules(filepath, _mtime(filepath)))
+
+@functools.lru_cache(maxsize=16)
+def _parse_regex_rules(filepath, mtime):
     rules = []
     if os.path.exists(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
@@ -175,36 +207,77 @@ def load_regex_rules(filepath):
                         pattern = parts[1].strip('`').replace(r'\|', '|') # Remove markdown code ticks and unescape pipes
                         replacement = parts[2].strip('`').replace(r'\|', '|') if len(parts) > 2 else ""
                         rules.append((pattern, replacement))
-    return rules
+    return tuple(rules)
 
 REGEX_RULES = load_regex_rules(STYLE_GUIDE_PATH)
 
-def humanize_text(text: str) -> str:
+# A rule is "line-local" if none of its matches can reach across a newline; those run once
+# over all lines joined with "\n". Anything with \s, negated classes, dots or anchors could,
+# so it runs line by line (the order of rules is kept either way).
+_CROSS_LINE_RE = re.compile(r'\\[sWDZA]|\[\^|(?<!\\)[.^$]|\\n')
+
+def _compile_rules(rules):
+    compiled = []
+    for pattern, replacement in rules:
+        try:
+            line_local = not _CROSS_LINE_RE.search(pattern) and "\n" not in replacement
+            compiled.append((re.compile(pattern), replacement, line_local))
+        except re.error:
+            pass # Invalid rule: skipped, as before
+    return compiled
+
+# Compiled once at import. The style-guide rules stay an ordered list rather than one big
+# alternation: they use inline (?i) flags and later rules see earlier rules' output.
+_COMPILED_RULES = _compile_rules(REGEX_RULES)
+_AI_CONNECTORS = {"此外，": "另外，", "总而言之，": "简单说，", "不可或缺": "很重要", "意味着": "说明"}
+_AI_CONNECTOR_RE = re.compile("|".join(map(re.escape, _AI_CONNECTORS)))
+_PUNCT_TABLE = str.maketrans({",": "，", "?": "？", "!": "！"})
+_SPACE_RE = re.compile(r'[^\S\n]+')
+_EDGE_SPACE_RE = re.compile(r'^ | $', re.MULTILINE)
+
+def humanize_lines(lines: List[str]) -> List[str]:
     """
-    Applies configured Regex rules and basic Humanizer cleanup.
+    Applies configured Regex rules and basic Humanizer cleanup to many lines at once.
+    Same result as humanize_text per line, but each rule scans one joined string.
     """
+    text = "\n".join(l.replace("\n", " ") for l in lines)
+
     # 0. Apply Regex Rules from STYLE_GUIDE.md
-    for pattern, replacement in REGEX_RULES:
+    for pattern, replacement, line_local in _COMPILED_RULES:
         try:
-            text = re.sub(pattern, replacement, text)
+            if line_local:
+                new_text = pattern.sub(replacement, text)
+                # A line-local match can't remove a line break, so a changed count means the
+                # replacement (e.g. a "\n" template escape) added one: redo this rule line by line
+                if new_text.count("\n") == text.count("\n"):
+                    text = new_text
+                    continue
+            # Line breaks a replacement inserts become spaces (the final whitespace trim did that
+            # per line before), so the line boundaries stay where they are
+            text = "\n".join(pattern.sub(replacement, l).replace("\n", " ") for l in text.split("\n"))
         except Exception as e:
             # print(f"Regex error: {e} pattern={pattern}")
             pass
 
     # 1. Remove common AI connectors (Hardcoded fallbacks)
-    text = text.replace("此外，", "另外，")
-    text = text.replace("总而言之，", "简单说，")
-    text = text.replace("不可或缺", "很重要")
-    text = text.replace("意味着", "说明")
+    text = _AI_CONNECTOR_RE.sub(lambda m: _AI_CONNECTORS[m.group(0)], text)
     
     # 2. Fix punctuation
-    text = text.replace(",", "，").replace("?", "？").replace("!", "！")
+    text = text.translate(_PUNCT_TABLE)
     
-    # 3. Trim extra spaces
-    text = re.sub(r'\s+', ' ', text).strip()
+    # 3. Trim extra spaces (the newlines are the line separators)
+    text = _EDGE_SPACE_RE.sub('', _SPACE_RE.sub(' ', text))
     
-    return text
+    return text.split("\n")
+
+def humanize_text(text: str) -> str:
+    """
+    Applies configured Regex rules and basic Humanizer cleanup.
+    """
+    return humanize_lines([text])[0]
+
 
+_HAS_CJK = re.compile(r'[\u4e00-\u9fff]').search
 
 def is_untranslated(block: Dict) -> bool:
     """
@@ -216,39 +289,33 @@ def is_untranslated(block: Dict) -> bool:
     text = " ".join(block.get('lines', [])).strip()
     if not text:
         return True
-    markers = ['[UNTRANSLATED]', '[TRANSLATION_FAILED]']
-    if any(m in text for m in markers):
+    if '[UNTRANSLATED]' in text or '[TRANSLATION_FAILED]' in text:
         return True
     # If there's any Chinese, it's a valid (possibly mixed) translation
-    if re.search(r'[\u4e00-\u9fff]', text):
+    if _HAS_CJK(text):
         return False
-    alpha = [c for c in text if c.isalpha()]
+    # One sweep, no intermediate list: count letters and how many of them are ASCII
+    alpha = ascii_alpha = 0
+    for c in text:
+        if c.isalpha():
+            alpha += 1
+            if c < '\x80':
+                ascii_alpha += 1
     if not alpha:
         return False
-    ascii_ratio = sum(1 for c in alpha if ord(c) < 128) / len(alpha)
-    return ascii_ratio > 0.7 and len(alpha) >= 8
+    return ascii_alpha / alpha > 0.7 and alpha >= 8
 
 
-def translate_blocks(blocks: List[Dict], client, model: str, style: str,
-                     verbalizer_snippet: str, humanizer_snippet: str,
-                     knowledge_snippet: str) -> List[Dict]:
-    """
-    Translates a list of blocks (may be any size) using generate_batch.
-    Returns the blocks with translations applied. Does NOT apply humanize_text.
-    Original text is kept as fallback for any block whose translation is missing/empty.
-    """
-    BATCH = 20
-    total = len(blocks)
-    tasks = []
+# Per-chunk prompt framing around the "[ID] text" lines
+_PAYLOAD_HEAD = "### STEP 4: CONTEXT AWARENESS\nINPUT BLOCK:\n"
+_PAYLOAD_TAIL = "\n\nOUTPUT FORMAT:\n[ID] Translated Text\n...\n"
+_STRICT_TAIL = "\n\nOUTPUT FORMAT (STRICT — one line per segment, no extra text):\n[ID] Translated Text\n...\n"
 
-    for i in range(0, total, BATCH):
-        chunk = blocks[i:i + BATCH]
-        input_text = ""
-        for block in chunk:
-            text = " ".join(block['lines']).replace("\n", " ").strip()
-            input_text += f"[{block['index']}] {text}\n"
-
-        prompt = f"""You are an expert subtitle translator and editor.
+@functools.lru_cache(maxsize=None)
+def style_preamble(style, verbalizer_snippet=_VERB_SNIPPET, knowledge_snippet=_KNOWLEDGE_SNIPPET,
+                   humanizer_snippet=_HUM_SNIPPET):
+    """The shared prompt preamble for a style, built once per style (there are only a few)."""
+    return f"""You are an expert subtitle translator and editor.
 Translate the following English subtitles into Simplified Chinese.
 
 ### STEP 1: VERBALIZATION (Tone & Persona)
@@ -261,37 +328,46 @@ TARGET STYLE: {style}
 ### STEP 3: HUMANIZATION (De-AI)
 {humanizer_snippet}...
 
-### STEP 4: CONTEXT AWARENESS
-INPUT BLOCK:
-{input_text}
-
-OUTPUT FORMAT (STRICT — one line per segment, no extra text):
-[ID] Translated Text
-...
 """
+
+def translate_blocks(blocks: List[Dict], client, model: str, style: str,
+                     verbalizer_snippet: str, humanizer_snippet: str,
+                     knowledge_snippet: str, use_cache: bool = True) -> List[Dict]:
+    """
+    Translates a list of blocks (may be any size) using generate_batch.
+    Returns the blocks with translations applied. Does NOT apply humanize_text.
+    Original text is kept as fallback for any block whose translation is missing/empty.
+    use_cache=False sends the prompts even if the client has a cached reply for them.
+    """
+    BATCH = 20
+    total = len(blocks)
+    tasks = []
+
+    ids = [str(b['index']) for b in blocks]
+    texts = [" ".join(b['lines']).replace("\n", " ").strip() for b in blocks]
+
+    # The invariant head is prepended by generate_batch; tasks only hold their block
+    prompt_head = style_preamble(style, verbalizer_snippet, knowledge_snippet, humanizer_snippet) + _PAYLOAD_HEAD
+
+    for i in range(0, total, BATCH):
+        chunk = blocks[i:i + BATCH]
+        prompt = _format_input(ids[i:i + BATCH], texts[i:i + BATCH], tail=_STRICT_TAIL)
         tasks.append({'index': i // BATCH, 'chunk': chunk, 'prompt': prompt})
 
-    results = client.generate_batch(tasks, model)
-    results.sort(key=lambda x: x['index'])
+    results = client.generate_batch(tasks, model, prompt_prefix=prompt_head, use_cache=use_cache) # already in task order
 
     # Build a map of all translations
     translated_map = {}
     for res in results:
         result_text = res.get('result')
         if result_text:
-            for line in result_text.split('\n'):
-                match = re.match(r'\[(\d+)\]\s*(.*)', line.strip())
-                if match:
-                    idx = match.group(1)
-                    content = match.group(2).strip()
-                    if content:  # guard: reject empty translations
-                        translated_map[idx] = content
+            # guard: reject empty translations
+            translated_map.update((m.group(1), m.group(2)) for m in _RESP_RE.finditer(result_text) if m.group(2))
 
     # Apply translations; fall back to original text if missing
     out = []
-    for block in blocks:
+    for block, idx in zip(blocks, ids):
         new_block = block.copy()
-        idx = str(block['index'])
         if idx in translated_map:
             new_block['lines'] = [translated_map[idx]]
         # else: keep whatever was there (original EN or previous attempt)
@@ -307,8 +383,10 @@ def postprocess_retry_loop(final_blocks: List[Dict], client, model: str, style:
     (or max_iterations is reached). Returns final_blocks with all translations filled.
     Does NOT apply humanize_text — that is done in a single pass after this function.
     """
+    # Only re-translated blocks can change state, so after this full scan just the
+    # previous misses are re-checked each pass
+    missed_positions = [i for i, b in enumerate(final_blocks) if is_untranslated(b)]
     for iteration in range(1, max_iterations + 1):
-        missed_positions = [i for i, b in enumerate(final_blocks) if is_untranslated(b)]
         if not missed_positions:
             print(f"✅ Post-processing complete after {iteration - 1} extra pass(es). All segments translated.")
             break
@@ -317,9 +395,10 @@ def postprocess_retry_loop(final_blocks: List[Dict], client, model: str, style:
               f"{len(missed_positions)} untranslated segment(s) detected. Re-translating...")
 
         missed_blocks = [final_blocks[i] for i in missed_positions]
+        # Uncached: an identical prompt would otherwise get back the same reply that just missed these
         retranslated = translate_blocks(
             missed_blocks, client, model, style,
-            verbalizer_snippet, humanizer_snippet, knowledge_snippet
+            verbalizer_snippet, humanizer_snippet, knowledge_snippet, use_cache=False
         )
 
         # Re-insert results at original positions
@@ -327,41 +406,121 @@ def postprocess_retry_loop(final_blocks: List[Dict], client, model: str, style:
             final_blocks[pos] = new_block
 
         # Report remaining
-        still_missed = [i for i, b in enumerate(final_blocks) if is_untranslated(b)]
+        still_missed = [i for i in missed_positions if is_untranslated(final_blocks[i])]
         resolved = len(missed_positions) - len(still_missed)
         print(f"   ✔ Resolved: {resolved} | Still untranslated: {len(still_missed)}")
+        missed_positions = still_missed
     else:
-        still_missed = [i for i, b in enumerate(final_blocks) if is_untranslated(b)]
-        if still_missed:
+        if missed_positions:
             print(f"⚠️ Max iterations ({max_iterations}) reached. "
-                  f"{len(still_missed)} segment(s) still untranslated.")
+                  f"{len(missed_positions)} segment(s) still untranslated.")
 
     return final_blocks
 
-def main():
-    parser = argparse.ArgumentParser(description="Smart Translation with Context & Style")
-    parser.add_argument("input", help="Input English SRT file")
-    parser.add_argument("--style", default="casual", choices=["casual", "formal", "edgy"])
-    parser.add_argument("--model", default="gemini-3-pro", help="Gemini Model (e.g. gemini-3-flash)")
-    parser.add_argument("--chunk-size", type=int, default=50, help="Number of blocks per batch")
-    
-    args = parser.parse_args()
-    
-    input_path = os.path.abspath(args.input)
-    if not os.path.exists(input_path):
-        print(f"File not found: {input_path}")
-        return
-
-    print(f"🚀 Starting Smart Translation for: {os.path.basename(input_path)}")
-    print(f"   Style: {args.style} | Chunk Size: {args.chunk_size}")
+def get_output_path(input_path: str) -> str:
+    """Returns the .cn.srt path that belongs to an English source SRT."""
+    if input_path.lower().endswith(".en.srt"):
+        return input_path[:-7] + ".cn.srt"
+    return input_path.replace(".srt", ".cn.srt")
 
-    # 1. Parse Input
-    blocks = srt_utils.parse_srt(input_path)
-    if not blocks:
-        print("Error parsing SRT file.")
-        return
 
-    total_chunks = math.ceil(len(blocks) / args.chunk_size)
+def pack_chunks(texts: List[str], max_chars: int) -> List[tuple]:
+    """
+    Splits texts into consecutive (start, end) spans of roughly max_chars each, so every
+    chunk costs the model about the same regardless of how long individual lines are.
+    """
+    spans = []
+    start, total = 0, 0
+    for i, text in enumerate(texts):
+        if total and total + len(text) > max_chars:
+            spans.append((start, i))
+            start, total = i, 0
+        total += len(text)
+    if start < len(texts):
+        spans.append((start, len(texts)))
+    return spans
+
+def translate_srt(blocks: List[Dict], style: str = "casual", target_model: str = "gemini-3-pro",
+                  chunk_size: int = 50, batch_mode: bool = False, use_cache: bool = False,
+                  semantic_cache: bool = False, progress_path: str = None, chunk_chars: int = None) -> List[Dict]:
+    """
+    Translates already-parsed SRT blocks end to end: parallel chunk translation,
+    retry of untranslated segments and final humanization.
+    batch_mode submits the first pass as one Gemini Batch job (cheaper, slower); the
+    retry pass always uses live requests since it only covers a few segments.
+    Chunks are packed by characters (chunk_chars, default: chunk_size average-length lines)
+    rather than a fixed block count, so parallel requests finish at about the same time.
+    use_cache (opt-in) serves lines this model translated in earlier runs from the translation
+    memory (semantic_cache also matches near-duplicates) and only sends the rest to the LLM.
+    Lines repeated within the run are sent once and the translation is copied to the repeats.
+    progress_path is a JSONL checkpoint appended after every finished chunk; a rerun after
+    a crash reuses the lines it holds (if their source text is unchanged).
+    Returns the translated blocks, or None if the batch could not be executed.
+    """
+    # 1b. Translation memory: repeated lines ("Yeah.", intros...) don't need an LLM call
+    # Block text and id are joined/stringified once here into parallel lists (texts[i] / ids[i]
+    # belong to blocks[i]) instead of again in every prompt-building and result-applying loop
+    all_blocks = blocks
+    all_texts = [" ".join(b['lines']).replace("\n", " ").strip() for b in all_blocks]
+    texts = all_texts
+    tm = None
+    hits = {}
+    if use_cache:
+        try:
+            import translation_cache
+            tm = translation_cache.TranslationCache(semantic=semantic_cache)
+            hits = tm.get_many(target_model, style, all_texts)
+        except Exception as e:
+            print(f"⚠️ Translation cache unavailable: {e}")
+            tm = None
+
+    # 1c. Checkpoint of an interrupted earlier run: {idx: (source text, translation)}
+    done = {}
+    ckpt = None
+    if progress_path:
+        if os.path.exists(progress_path):
+            with open(progress_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                        # Older checkpoints may hold English echoes; those lines go back to the model
+                        if not is_untranslated({'lines': [rec['text']]}):
+                            done[rec['idx']] = (rec['src'], rec['text'])
+                    except (ValueError, KeyError):
+                        pass # Torn last line from a crash
+        ckpt = open(progress_path, 'a', encoding='utf-8')
+
+    # Positions already translated (cache or checkpoint) are not sent again
+    prefilled = {}
+    for pos, (block, text) in enumerate(zip(all_blocks, all_texts)):
+        if text in hits:
+            prefilled[pos] = hits[text]
+        else:
+            prev = done.get(str(block['index']))
+            if prev and prev[0] == text:
+                prefilled[pos] = prev[1]
+    if prefilled:
+        print(f"♻️ Reused {len(prefilled)}/{len(all_blocks)} segment(s) from translation memory/checkpoint")
+    # Repeated lines ("Yeah.", "Thank you.") are sent once; the repeats copy the first one's translation
+    first = {}
+    dup_of = {}
+    for pos, text in enumerate(all_texts):
+        if text in first and pos not in prefilled:
+            dup_of[pos] = first[text]
+        first.setdefault(text, pos)
+    if dup_of:
+        print(f"♻️ {len(dup_of)} repeated segment(s) will reuse the translation of their first occurrence")
+    if prefilled or dup_of:
+        keep = [i for i in range(len(all_blocks)) if i not in prefilled and i not in dup_of]
+        blocks = [all_blocks[i] for i in keep]
+        texts = [all_texts[i] for i in keep]
+    ids = [str(b['index']) for b in blocks]
+
+    if not chunk_chars:
+        # Same number of chunks as fixed chunk_size windows, just length-balanced
+        chunk_chars = max(1, sum(map(len, texts)) * chunk_size // max(1, len(texts)))
+    spans = pack_chunks(texts, chunk_chars)
+    total_chunks = len(spans)
     print(f"   Total Blocks: {len(blocks)} -> {total_chunks} Chunks")
 
     final_blocks = []
@@ -371,70 +530,53 @@ def main():
     tasks = []
     
     # Pre-load rules for efficiency
-    verbalizer_snippet = VERBALIZER_RULES[:1500] if VERBALIZER_RULES else "Translate naturally."
-    humanizer_snippet = HUMANIZER_RULES[:1500] if HUMANIZER_RULES else "Do not sound robotic."
-    knowledge_snippet = ""
-    if SUBTRANSLATOR_RULES:
-        # Extract Domain Knowledge if present, or just use relevant parts
-        match = re.search(r'(## Domain Knowledge & ASR Correction.*)', SUBTRANSLATOR_RULES, re.DOTALL)
-        if match:
-            knowledge_snippet = match.group(1).strip()
-        else:
-            # Fallback to general constraints if section not found (or just empty)
-            pass
+    verbalizer_snippet = _VERB_SNIPPET
+    humanizer_snippet = _HUM_SNIPPET
+    knowledge_snippet = _KNOWLEDGE_SNIPPET
+    
+    # Static preamble shared by every chunk; generate_batch prepends it at send time
+    system_prompt = style_preamble(style, verbalizer_snippet, knowledge_snippet, humanizer_snippet)
     
     print(f"📦 Preparing {total_chunks} chunks for parallel processing...")
     
-    for i in range(total_chunks):
-        start = i * args.chunk_size
-        end = min((i + 1) * args.chunk_size, len(blocks))
+    for i, (start, end) in enumerate(spans):
         chunk = blocks[start:end]
         
-        # Construct Prompt string here in main loop to be thread-safe/independent
-        input_text = ""
-        for block in chunk:
-            text = " ".join(block['lines']).replace("\n", " ").strip()
-            input_text += f"[{block['index']}] {text}\n"
-            
-        prompt = f"""
-You are an expert subtitle translator and editor.
-Translate the following English subtitles into Simplified Chinese.
-
-### STEP 1: VERBALIZATION (Tone & Persona)
-{verbalizer_snippet}...
-TARGET STYLE: {args.style}
-
-### STEP 2: DOMAIN KNOWLEDGE & ASR CORRECTION
-{knowledge_snippet}
-
-### STEP 3: HUMANIZATION (De-AI)
-{humanizer_snippet}...
-
-### STEP 4: CONTEXT AWARENESS
-INPUT BLOCK:
-{input_text}
-
-OUTPUT FORMAT:
-[ID] Translated Text
-...
-"""
+        # Construct Prompt string here in main loop to be thread-safe/independent.
+        # Only the chunk-specific payload is stored; the shared preamble is prepended at send time
         tasks.append({
             'index': i,
             'chunk': chunk,
-            'prompt': prompt
+            'ids': ids[start:end],
+            'texts': texts[start:end],
+            'prompt': _format_input(ids[start:end], texts[start:end], _PAYLOAD_HEAD, _PAYLOAD_TAIL)
         })
 
+    def checkpoint(res):
+        """Appends a finished chunk's translations to the progress file right away."""
+        if not ckpt or not res.get('result'): return
+        got = {m.group(1): m.group(2) for m in _RESP_RE.finditer(res['result']) if m.group(2)}
+        for idx, src in zip(res['ids'], res['texts']):
+            # Echoed English is left out so a rerun still sends it through the retry loop
+            if idx in got and not is_untranslated({'lines': [got[idx]]}):
+                ckpt.write(json.dumps({"idx": idx, "src": src, "text": got[idx]}, ensure_ascii=False) + "\n")
+        ckpt.flush()
+
     # Execute Batch
     try:
-        # Use user-specified model, or default to gemini-1.5-flash.
-        target_model = args.model
         print(f"🚀 Using LLM: {target_model}...")
         
-        results = client.generate_batch(tasks, target_model)
-        
-        # Sort results by index to ensure correct subtitle order
-        results.sort(key=lambda x: x['index'])
+        results = None
+        if batch_mode:
+            results = client.generate_batch_job(tasks, target_model, prompt_prefix=system_prompt)
+            if results is None:
+                print("⚠️ Batch mode unavailable, falling back to live requests.")
+            else:
+                for res in results: checkpoint(res)
+        if results is None:
+            results = client.generate_batch(tasks, target_model, prompt_prefix=system_prompt, on_result=checkpoint)
         
+        # Both batch paths return results in task (= subtitle) order
         for res in results:
             result_text = res.get('result')
             chunk = res['chunk']
@@ -443,60 +585,130 @@ OUTPUT FORMAT:
             
             if result_text:
                 # Parse output logic
-                translated_map = {}
-                for line in result_text.split('\n'):
-                    match = re.match(r'\[(\d+)\]\s*(.*)', line.strip())
-                    if match:
-                        idx = match.group(1)
-                        content = match.group(2).strip()
-                        if content:  # guard: reject empty translations
-                            translated_map[idx] = content
+                # guard: reject empty translations
+                translated_map = {m.group(1): m.group(2) for m in _RESP_RE.finditer(result_text) if m.group(2)}
 
                 # Apply translations; keep original as fallback for missing/empty
-                for block in chunk:
+                for block, idx in zip(chunk, res['ids']):
                     new_block = block.copy()
-                    idx = str(block['index'])
                     if idx in translated_map:
                         new_block['lines'] = [translated_map[idx]]
                     # else: keep original English as fallback (detected by is_untranslated)
                     translated_chunk_blocks.append(new_block)
             else:
                 print(f"❌ Chunk {res['index']} failed completely. Will retry in post-processing.")
-                translated_chunk_blocks = chunk  # keep original for retry
+                translated_chunk_blocks = [b.copy() for b in chunk]  # keep original for retry (copies: caller may reuse the source blocks)
 
             final_blocks.extend(translated_chunk_blocks)
             
     except Exception as e:
         print(f"❌ Parallel execution failed: {e}")
-        return
+        if ckpt: ckpt.close()
+        return None
 
     # 3. Post-Processing: retry all untranslated segments
     untranslated_count = sum(1 for b in final_blocks if is_untranslated(b))
     if untranslated_count > 0:
         print(f"\n🔍 Post-processing: {untranslated_count} untranslated segment(s) found. Starting retry loop...")
         final_blocks = postprocess_retry_loop(
-            final_blocks, client, target_model, args.style,
+            final_blocks, client, target_model, style,
             verbalizer_snippet, humanizer_snippet, knowledge_snippet
         )
     else:
         print("\n✅ All segments translated on first pass. Skipping post-processing.", flush=True)
 
+    if ckpt:
+        # Retry-pass results too, so a crash after this point loses nothing
+        for block, idx, src in zip(final_blocks, ids, texts):
+            if not is_untranslated(block):
+                ckpt.write(json.dumps({"idx": idx, "src": src, "text": " ".join(block['lines'])}, ensure_ascii=False) + "\n")
+        ckpt.close()
+
+    if prefilled or dup_of:
+        # Re-interleave reused and repeated lines with the fresh translations
+        fresh = iter(final_blocks)
+        merged = []
+        for pos, block in enumerate(all_blocks):
+            if pos in prefilled:
+                new_block = block.copy()
+                new_block['lines'] = [prefilled[pos]]
+            elif pos in dup_of: # its first occurrence is earlier, so already in merged
+                new_block = block.copy()
+                new_block['lines'] = list(merged[dup_of[pos]]['lines'])
+            else:
+                new_block = next(fresh)
+            merged.append(new_block)
+        final_blocks = merged
+
+    # Translation memory stores the model's text; humanization runs on every read anyway
+    raw = [" ".join(block['lines']) for block in final_blocks] if tm else None
+
     # 4. Final Style-Guide Humanization (single pass over all blocks)
     print("\n✨ Applying style guide and humanization to all blocks...")
+    flat = humanize_lines([l for block in final_blocks for l in block['lines']])
+    pos = 0
     for block in final_blocks:
-        block['lines'] = [humanize_text(l) for l in block['lines']]
+        n = len(block['lines'])
+        block['lines'] = flat[pos:pos + n]
+        pos += n
+
+    if tm:
+        # Remember the new translations (everything not served by the cache itself)
+        learned = [(text, dst) for text, dst, block in zip(all_texts, raw, final_blocks)
+                   if text not in hits and not is_untranslated(block)]
+        try:
+            tm.put_many(target_model, style, learned)
+        except Exception as e:
+            print(f"⚠️ Could not update translation cache: {e}")
+        tm.close()
 
-    # 5. Save Output
-    if input_path.lower().endswith(".en.srt"):
-        output_path = input_path[:-7] + ".cn.srt"
-    else:
-        output_path = input_path.replace(".srt", ".cn.srt")
+    return final_blocks
 
+def main():
+    parser = argparse.ArgumentParser(description="Smart Translation with Context & Style")
+    parser.add_argument("input", help="Input English SRT file")
+    parser.add_argument("--style", default="casual", choices=["casual", "formal", "edgy"])
+    parser.add_argument("--model", default="gemini-3-pro", help="Gemini Model (e.g. gemini-3-flash)")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Number of blocks per batch")
+    parser.add_argument("--chunk-chars", type=int, default=None, help="Characters per batch (overrides --chunk-size)")
+    parser.add_argument("--batch-mode", action="store_true", help="Use Gemini Batch Mode (half price, results may take minutes)")
+    parser.add_argument("--cache", action="store_true", help="Reuse this model's translations of lines from earlier runs")
+    parser.add_argument("--semantic-cache", action="store_true", help="With --cache, also reuse near-duplicate lines (needs sentence-transformers)")
+    
+    args = parser.parse_args()
+    
+    input_path = os.path.abspath(args.input)
+    if not os.path.exists(input_path):
+        print(f"File not found: {input_path}")
+        return
+
+    print(f"🚀 Starting Smart Translation for: {os.path.basename(input_path)}")
+    print(f"   Style: {args.style} | Chunk Size: {args.chunk_size}")
+
+    # 1. Parse Input
+    blocks = srt_utils.parse_srt(input_path)
+    if not blocks:
+        print("Error parsing SRT file.")
+        return
+
+    # 2-4. Translate, retry, humanize
+    # Use user-specified model, or default to gemini-1.5-flash.
+    # Finished chunks are checkpointed next to the output, so a rerun after a crash picks up where it stopped
+    progress_path = os.path.splitext(get_output_path(input_path))[0] + ".progress.jsonl"
+    final_blocks = translate_srt(blocks, args.style, args.model, args.chunk_size, args.batch_mode,
+                                 args.cache, args.semantic_cache, progress_path, args.chunk_chars)
+    if final_blocks is None:
+        return
+
+    # 5. Save Output
+    output_path = get_output_path(input_path)
     if os.path.exists(output_path):
         base, ext = os.path.splitext(output_path)
         output_path = f"{base}_smart{ext}"
 
     srt_utils.write_srt(final_blocks, output_path)
+    try: os.remove(progress_path)
+    except OSError: pass
     print(f"✅ Translation Saved to: {output_path}", flush=True)
 
 if __name__ == "__main__":
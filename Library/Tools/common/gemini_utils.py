@@ -1,11 +1,56 @@
 from llm_utils import LLMClient, get_client, RateLimiter, LLMProvider as GeminiTier
 import os
+import threading
+from typing import Optional
 
 # Compatibility layer for legacy Gemini-only code
 class GeminiClient(LLMClient):
     def __init__(self, api_key=None):
         # In llm_utils, api_key is the 2nd argument, or we can use keyword
         super().__init__(api_key=api_key)
+        # Extra keys (comma-separated GEMINI_API_KEYS) to switch to when one hits its quota
+        keys = [k.strip() for k in os.environ.get("GEMINI_API_KEYS", "").split(",") if k.strip()]
+        first = self.api_keys[GeminiTier.GEMINI]
+        if first and first not in keys:
+            keys.insert(0, first)
+        self._keys = keys
+        self._idx = 0
+        self._key_lock = threading.Lock()
+
+    def _call_gemini(self, model_name: str, prompt: str) -> Optional[str]:
+        # Single key: nothing to rotate
+        if len(self._keys) < 2:
+            return super()._call_gemini(model_name, prompt)
+
+        from llm_utils import _import_genai
+        from google.api_core import exceptions as gexc
+        genai = _import_genai()
+        for _ in range(len(self._keys)):
+            with self._key_lock:
+                idx = self._idx
+                if not self._gemini_configured:
+                    genai.configure(api_key=self._keys[idx])
+                    self._gemini_configured = True
+            try:
+                model = self._gemini_model(model_name)
+                self.limiter.wait()
+                response = model.generate_content(prompt)
+                if response.text:
+                    return response.text.strip()
+                return None
+            except gexc.ResourceExhausted:
+                with self._key_lock:
+                    if self._idx == idx: # Another worker may have rotated already
+                        self._idx = (idx + 1) % len(self._keys)
+                        # genai is configured process-wide, so this switches every worker
+                        genai.configure(api_key=self._keys[self._idx])
+                        self._gemini_models.clear() # Cached models hold a client bound to the old key
+                        print(f"🔑 Quota exhausted, switching to Gemini key #{self._idx + 1}/{len(self._keys)}")
+            except Exception as e:
+                print(f"❌ Gemini API error: {e}")
+                return None
+        print("❌ All Gemini API keys are out of quota.")
+        return None
 
 def get_env_path():
     from llm_utils import get_env_path
@@ -2,9 +2,14 @@ import os
 import sys
 import time
 import threading
+import asyncio
+import collections
 import concurrent.futures
 import re
 import json
+import hashlib
+import random
+import functools
 import requests
 from enum import Enum
 from typing import List, Dict, Optional, Union
@@ -34,6 +39,13 @@ try:
 except ImportError:
     pass
 
+# orjson is optional; both decode the raw UTF-8 response body
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 class LLMProvider(Enum):
     GEMINI = "gemini"
     OPENAI = "openai"
@@ -44,28 +56,223 @@ class LLMProvider(Enum):
     SILICONFLOW = "siliconflow"
 
 class RateLimiter:
-    """Simple thread-safe rate limiter based on RPM."""
-    def __init__(self, rpm: int):
+    """
+    Thread-safe sliding-window rate limiter: at most rpm requests in any 60 s.
+    Workers go through immediately while there is room and only sleep (without holding
+    the lock) once the window is full. Unlike fixed 60/rpm spacing this allows bursts, so
+    they are capped too: at most `burst` requests in any burst * 60/rpm seconds.
+    """
+    def __init__(self, rpm: int, burst: int = 10):
         self.rpm = rpm
-        self.interval = 60.0 / rpm
-        self.last_request_time = 0
+        self.base_rpm = rpm
+        self.burst = max(1, burst)
+        self._requests = collections.deque() # timestamps of requests in the last 60 s
+        self._hold_until = 0.0 # set by backoff(): nobody goes before this
         self.lock = threading.Lock()
 
-    def wait(self):
-        sleep_time = 0
+    def backoff(self, delay: float):
+        """The server said slow down: hold every worker for delay seconds and lower the rate."""
         with self.lock:
-            current_time = time.time()
-            next_available = self.last_request_time + self.interval
-            if next_available > current_time:
-                sleep_time = next_available - current_time
-                self.last_request_time = next_available
-            else:
-                self.last_request_time = current_time
-        if sleep_time > 0:
-            time.sleep(sleep_time)
+            self._hold_until = max(self._hold_until, time.monotonic() + delay)
+            self.rpm = max(1, int(self.rpm * 0.75))
+
+    def relax(self):
+        """A request went through: creep back towards the configured rate."""
+        if self.rpm < self.base_rpm:
+            with self.lock:
+                self.rpm = min(self.base_rpm, self.rpm + 1)
+
+    def reserve(self) -> float:
+        """Takes a slot if there is one (returns 0), else returns how long to sleep before asking again."""
+        with self.lock:
+            now = time.monotonic()
+            if now < self._hold_until:
+                return self._hold_until - now
+            while self._requests and self._requests[0] <= now - 60:
+                self._requests.popleft()
+            if len(self._requests) >= self.rpm:
+                return self._requests[0] + 60 - now
+            burst = min(self.burst, self.rpm)
+            if len(self._requests) >= burst:
+                # The burst-th most recent request must be at least burst * 60/rpm seconds old
+                wait = self._requests[-burst] + burst * 60.0 / self.rpm - now
+                if wait > 0:
+                    return wait
+            self._requests.append(now)
+            return 0.0
+
+    def wait(self):
+        while True:
+            sleep_for = self.reserve()
+            if not sleep_for:
+                return
+            time.sleep(sleep_for)
+
+def _retry_after(headers) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        import datetime
+        return max(0.0, (parsedate_to_datetime(value) - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+class AsyncRateLimiter:
+    """
+    Coroutine view of a RateLimiter: same window and backoff as the sync callers (the thread lock
+    is only held for a few lines, never across a sleep), but waits with asyncio.sleep.
+    """
+    def __init__(self, limiter: RateLimiter):
+        self.limiter = limiter
+
+    async def wait(self):
+        while True:
+            sleep_for = self.limiter.reserve()
+            if not sleep_for:
+                return
+            await asyncio.sleep(sleep_for)
+
+class SemanticCache:
+    """
+    Near-duplicate prompt cache: prompts are embedded (L2-normalized, so cosine = dot product)
+    into one float32 matrix, and a lookup is a single matmul + argmax against it.
+    Opt-in only: prompts that share a long preamble can look alike while asking different things,
+    so keep the threshold high. Needs numpy + sentence-transformers; disabled if missing.
+    """
+    MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 4096):
+        import numpy as np
+        from sentence_transformers import SentenceTransformer
+        self._np = np
+        self._encoder = SentenceTransformer(self.MODEL)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vecs = None     # [capacity, D] float32, first _n rows used
+        self._responses = []  # parallel to the rows
+        self._scopes = []    # model + prefix hash per row
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def _encode(self, text: str):
+        return self._encoder.encode([text], normalize_embeddings=True, convert_to_numpy=True)[0].astype("float32")
+
+    def get(self, scope: str, prompt: str):
+        """
+        Returns (response or None, prompt vector) so a miss can be stored without re-encoding.
+        Only entries stored under the same scope (model + shared prompt prefix) can match.
+        """
+        vec = self._encode(prompt)
+        with self._lock:
+            if self._n:
+                scores = self._vecs[:self._n] @ vec
+                scores[self._np.fromiter((s != scope for s in self._scopes), bool, self._n)] = -1.0
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    return self._responses[best], vec
+        return None, vec
+
+    def put(self, scope: str, vec, response: str):
+        np = self._np
+        with self._lock:
+            if self._n >= self.max_entries:
+                return
+            if self._vecs is None:
+                self._vecs = np.empty((64, vec.shape[0]), dtype="float32")
+            elif self._n == len(self._vecs): # grow by doubling, so inserts stay amortized O(1)
+                self._vecs = np.concatenate([self._vecs, np.empty_like(self._vecs)])
+            self._vecs[self._n] = vec
+            self._responses.append(response)
+            self._scopes.append(scope)
+            self._n += 1
+
+_GENAI = None
+def _import_genai():
+    """Imports google.generativeai once per process instead of on every call."""
+    global _GENAI
+    if _GENAI is None:
+        import google.generativeai as genai
+        _GENAI = genai
+    return _GENAI
+
+# OpenAI-compatible endpoints (chat completions and /models)
+_BASE_URLS = {
+    LLMProvider.OPENAI: "https://api.openai.com/v1",
+    LLMProvider.MOONSHOT: "https://api.moonshot.cn/v1",
+    LLMProvider.DASHSCOPE: "https://dashscope.aliyuncs.com/compatible-mode/v1",
+    LLMProvider.ZHIPU: "https://open.bigmodel.cn/api/paas/v4",
+    LLMProvider.DEEPSEEK: "https://api.deepseek.com",
+    LLMProvider.SILICONFLOW: "https://api.siliconflow.cn/v1"
+}
+
+# Model ids containing any of these aren't chat models (embedding, vision-only, assistants...)
+_IGNORE_TOKENS = ('embedding', 'vector', 'search', 'text-moderation', 'whisper', 'dall-e', 'tts')
+
+# Primary brand per provider, sorted to the top of its model list
+_BRAND_MAP = {
+    LLMProvider.DASHSCOPE: "qwen",
+    LLMProvider.ZHIPU: "glm",
+    LLMProvider.MOONSHOT: "moonshot",
+    LLMProvider.DEEPSEEK: "deepseek"
+}
+
+# Used when discovery succeeds but returns nothing usable
+_FALLBACK_MODELS = {
+    LLMProvider.OPENAI: ("gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"),
+    LLMProvider.MOONSHOT: ("moonshot-v1-8k", "moonshot-v1-32k"),
+    LLMProvider.DASHSCOPE: ("qwen-turbo", "qwen-max"),
+    LLMProvider.ZHIPU: ("glm-4-flash", "glm-4"),
+    LLMProvider.DEEPSEEK: ("deepseek-chat", "deepseek-reasoner"),
+    LLMProvider.SILICONFLOW: ("deepseek-ai/DeepSeek-V3", "deepseek-ai/DeepSeek-R1", "Qwen/Qwen2.5-72B-Instruct-128K")
+}
+
+# Used when the discovery request itself fails
+_ERROR_FALLBACK_MODELS = {
+    LLMProvider.OPENAI: ("gpt-4o", "gpt-4o-mini", "gpt-4-turbo"),
+    LLMProvider.MOONSHOT: ("moonshot-v1-8k", "moonshot-v1-32k"),
+    LLMProvider.DASHSCOPE: ("qwen-turbo", "qwen-max", "qwen-plus"),
+    LLMProvider.ZHIPU: ("glm-4-flash", "glm-4", "glm-4-air"),
+    LLMProvider.DEEPSEEK: ("deepseek-chat", "deepseek-reasoner"),
+    LLMProvider.SILICONFLOW: ("deepseek-ai/DeepSeek-V3", "deepseek-ai/DeepSeek-R1")
+}
+
+# Model-name keyword -> provider, checked in this order (first hit wins, e.g.
+# "DeepSeek-R1-Distill-Qwen-7B" is DashScope because "qwen" is checked before "deepseek")
+_PROVIDER_MAP = (
+    ("gpt", LLMProvider.OPENAI),
+    ("moonshot", LLMProvider.MOONSHOT),
+    ("kimi", LLMProvider.MOONSHOT),
+    ("qwen", LLMProvider.DASHSCOPE),
+    ("glm", LLMProvider.ZHIPU),
+    ("deepseek", LLMProvider.DEEPSEEK),
+)
+
+@functools.lru_cache(maxsize=256)
+def _provider_for(model_name: str) -> LLMProvider:
+    """Provider of a model name; only a handful of names are ever used, so each is resolved once."""
+    model_name = model_name.lower()
+    for key, provider in _PROVIDER_MAP:
+        if key in model_name:
+            return provider
+    return LLMProvider.GEMINI
 
 class LLMClient:
-    def __init__(self, api_key: Optional[str] = None, provider: Optional[LLMProvider] = None):
+    RESPONSE_CACHE_MAX = 512     # entries
+    RESPONSE_CACHE_TTL = 3600    # seconds
+    MODEL_LIST_TTL = 300         # seconds a provider's model list is reused
+    TEMPERATURE = 0.3
+    MAX_RETRIES = 3              # per call, on 429/503 and network errors
+    BACKOFF_BASE = 1.0           # seconds, doubled per attempt when there's no Retry-After
+
+    def __init__(self, api_key: Optional[str] = None, provider: Optional[LLMProvider] = None,
+                 use_cache: Optional[bool] = None, semantic_cache: Optional[bool] = None):
         self.api_keys = {
             LLMProvider.GEMINI: api_key or os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY"),
             LLMProvider.OPENAI: os.environ.get("OPENAI_API_KEY"),
@@ -89,16 +296,78 @@ class LLMClient:
             self.max_workers = 20
             
         self.limiter = RateLimiter(self.rpm_limit)
+        self.async_limiter = AsyncRateLimiter(self.limiter) # shares the window with sync calls
         self._gemini_configured = False
 
+        # Provider -> OpenAI-compatible endpoint, resolved once (OPENAI_API_BASE overrides OpenAI's)
+        self._base_urls = dict(_BASE_URLS)
+        openai_base = os.environ.get("OPENAI_API_BASE")
+        if openai_base:
+            # Ensure no double /v1
+            if openai_base.endswith("/v1/"): openai_base = openai_base[:-1]
+            self._base_urls[LLMProvider.OPENAI] = openai_base
+        self._gemini_models = {} # model name (or cache name) -> GenerativeModel, reused across calls
+        self._session = self._make_session()
+        self._model_cache = {} # provider -> (expiry, model list)
+        self._executor = None # shared generate_batch pool, see _get_executor()
+        self._executor_lock = threading.Lock()
+
+        # Opt-in response cache (sampling at TEMPERATURE isn't deterministic, so off by default):
+        # identical (model, prompt) calls within the TTL are answered from memory
+        if use_cache is None:
+            use_cache = os.environ.get("LLM_RESPONSE_CACHE", "").lower() in ("1", "true", "yes")
+        self.use_cache = use_cache
+        self._cache = collections.OrderedDict() # key -> (timestamp, text)
+        self._cache_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "semantic_hits": 0}
+
+        # Optional second layer behind the exact cache: near-duplicate prompts (LLM_SEMANTIC_CACHE=1)
+        if semantic_cache is None:
+            semantic_cache = os.environ.get("LLM_SEMANTIC_CACHE", "").lower() in ("1", "true", "yes")
+        self._semantic = None
+        if semantic_cache:
+            try:
+                self._semantic = SemanticCache(float(os.environ.get("LLM_SEMANTIC_THRESHOLD", "0.92")))
+                self.use_cache = True
+            except Exception as e:
+                print(f"⚠️ Semantic cache disabled ({e}); using exact matches only.")
+
+    def _make_session(self):
+        """
+        One keep-alive connection pool for all OpenAI-compatible calls (no TLS handshake per request).
+        With httpx + h2 installed it is an HTTP/2 client instead, so concurrent requests to one host
+        share a single multiplexed connection (LLM_HTTP2=0 turns that off).
+        """
+        self._network_errors = (requests.ConnectionError, requests.Timeout)
+        self._retry_statuses = (429, 503)
+        if os.environ.get("LLM_HTTP2", "1") != "0":
+            try:
+                import httpx
+                import h2 # noqa: F401 (httpx needs it for http2=True)
+                self._network_errors = (httpx.TransportError,)
+                # httpx has no status retry like urllib3's Retry, so _call_openai_compatible
+                # retries plain 5xx itself on this path (the transport only retries failed connects)
+                self._retry_statuses = (429, 500, 502, 503, 504)
+                limits = httpx.Limits(max_connections=self.max_workers, max_keepalive_connections=self.max_workers)
+                transport = httpx.HTTPTransport(http2=True, limits=limits, retries=3)
+                return httpx.Client(transport=transport, timeout=60)
+            except ImportError:
+                pass
+
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        # 429/503 and network errors are retried by _call_openai_compatible itself (which also
+        # throttles the limiter), so the adapter only retries plain 5xx responses
+        retry = Retry(total=3, connect=0, read=0, backoff_factor=0.5, status_forcelist=[500, 502, 504],
+                      allowed_methods=frozenset(["GET", "POST"]), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers * 2, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
     def _get_provider(self, model_name: str) -> LLMProvider:
-        model_name = model_name.lower()
-        if "gpt" in model_name: return LLMProvider.OPENAI
-        if "moonshot" in model_name or "kimi" in model_name: return LLMProvider.MOONSHOT
-        if "qwen" in model_name: return LLMProvider.DASHSCOPE
-        if "glm" in model_name: return LLMProvider.ZHIPU
-        if "deepseek" in model_name: return LLMProvider.DEEPSEEK
-        return LLMProvider.GEMINI
+        return _provider_for(model_name)
 
     def _call_openai_compatible(self, model_name: str, prompt: str, base_url: str, api_key: str) -> Optional[str]:
         if not api_key:
@@ -112,18 +381,52 @@ class LLMClient:
         data = {
             "model": model_name,
             "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.3
+            "temperature": self.TEMPERATURE
         }
         
-        self.limiter.wait()
-        try:
-            response = requests.post(f"{base_url}/chat/completions", headers=headers, json=data, timeout=60)
-            response.raise_for_status()
-            res_json = response.json()
-            return res_json['choices'][0]['message']['content'].strip()
-        except Exception as e:
-            print(f"❌ OpenAI-compatible API error ({model_name}): {e}")
-            return None
+        # 429/503 honour Retry-After and slow the shared limiter down for every worker;
+        # network errors (and plain 5xx on httpx) back off exponentially. Anything else fails the call.
+        for attempt in range(self.MAX_RETRIES + 1):
+            self.limiter.wait()
+            try:
+                response = self._session.post(f"{base_url}/chat/completions", headers=headers, json=data, timeout=60)
+                if response.status_code in self._retry_statuses and attempt < self.MAX_RETRIES:
+                    delay = _retry_after(response.headers) if response.status_code in (429, 503) else None
+                    if delay is None:
+                        delay = self.BACKOFF_BASE * 2 ** attempt
+                    if response.status_code in (429, 503):
+                        self.limiter.backoff(delay)
+                    print(f"⏳ {model_name}: HTTP {response.status_code}, retrying in {delay:.1f}s...")
+                    time.sleep(delay + random.uniform(0, 0.5))
+                    continue
+                response.raise_for_status()
+                res_json = _json_loads(response.content)
+                self.limiter.relax()
+                return res_json['choices'][0]['message']['content'].strip()
+            except self._network_errors as e:
+                if attempt < self.MAX_RETRIES:
+                    time.sleep(self.BACKOFF_BASE * 2 ** attempt + random.uniform(0, 0.5))
+                    continue
+                print(f"❌ OpenAI-compatible API error ({model_name}): {e}")
+                return None
+            except Exception as e:
+                print(f"❌ OpenAI-compatible API error ({model_name}): {e}")
+                return None
+        return None
+
+    def _gemini(self):
+        """google.generativeai, imported and configured on first use (it is slow to import)."""
+        genai = _import_genai()
+        if not self._gemini_configured:
+            genai.configure(api_key=self.api_keys[LLMProvider.GEMINI])
+            self._gemini_configured = True
+        return genai
+
+    def _gemini_model(self, model_name: str):
+        model = self._gemini_models.get(model_name)
+        if model is None:
+            model = self._gemini_models[model_name] = self._gemini().GenerativeModel(model_name)
+        return model
 
     def _call_gemini(self, model_name: str, prompt: str) -> Optional[str]:
         api_key = self.api_keys[LLMProvider.GEMINI]
@@ -132,12 +435,7 @@ class LLMClient:
             return None
             
         try:
-            import google.generativeai as genai
-            if not self._gemini_configured:
-                genai.configure(api_key=api_key)
-                self._gemini_configured = True
-            
-            model = genai.GenerativeModel(model_name)
+            model = self._gemini_model(model_name)
             self.limiter.wait()
             response = model.generate_content(prompt)
             if response.text:
@@ -147,82 +445,304 @@ class LLMClient:
             print(f"❌ Gemini API error: {e}")
             return None
 
-    def generate_content(self, prompt: str, model_name: str = "gemini-1.5-flash", fallback: bool = True) -> Optional[str]:
+    @staticmethod
+    def _cache_key(model_name: str, prompt: str, temperature: float) -> str:
+        payload = {"model": model_name, "prompt": prompt, "temperature": temperature}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def generate_content(self, prompt: str, model_name: str = "gemini-1.5-flash", fallback: bool = True,
+                         prompt_prefix: str = "", use_cache: bool = True) -> Optional[str]:
+        """
+        Sends prompt_prefix + prompt. The prefix (a preamble shared by many calls) is kept apart
+        so the semantic cache only embeds the part that actually differs between calls.
+        use_cache=False skips the response caches for this call (e.g. a retry of a prompt whose
+        cached reply failed validation would otherwise get the same reply back).
+        """
+        payload = prompt
+        prompt = prompt_prefix + prompt
+        if not (self.use_cache and use_cache):
+            return self._generate_uncached(prompt, model_name, fallback)
+
+        key = self._cache_key(model_name, prompt, self.TEMPERATURE)
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry and now - entry[0] <= self.RESPONSE_CACHE_TTL:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+
+        vec = None
+        if self._semantic:
+            # The embedding model truncates long inputs, so a shared preamble would make every
+            # prompt look identical: embed only the payload and scope matches to the same prefix
+            scope = f"{model_name}|{hashlib.sha1(prompt_prefix.encode('utf-8')).hexdigest()}"
+            text, vec = self._semantic.get(scope, payload)
+            if text is not None:
+                with self._cache_lock:
+                    self.stats["semantic_hits"] += 1
+                return text
+
+        text = self._generate_uncached(prompt, model_name, fallback)
+        if text is not None: # Failures are not cached, so they get retried
+            if vec is not None:
+                self._semantic.put(scope, vec, text)
+            with self._cache_lock:
+                self._cache[key] = (now, text)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.RESPONSE_CACHE_MAX:
+                    self._cache.popitem(last=False)
+        return text
+
+    def _generate_uncached(self, prompt: str, model_name: str, fallback: bool = True) -> Optional[str]:
         provider = self._get_provider(model_name)
         
-        if provider == LLMProvider.GEMINI:
+        if provider is LLMProvider.GEMINI:
             return self._call_gemini(model_name, prompt)
-        
-        elif provider == LLMProvider.OPENAI:
-            base_url = os.environ.get("OPENAI_API_BASE") or "https://api.openai.com/v1"
-            # Ensure no double /v1
-            if base_url.endswith("/v1/"): base_url = base_url[:-1]
-            return self._call_openai_compatible(model_name, prompt, base_url, self.api_keys[LLMProvider.OPENAI])
-            
-        elif provider == LLMProvider.MOONSHOT:
-            return self._call_openai_compatible(model_name, prompt, "https://api.moonshot.cn/v1", self.api_keys[LLMProvider.MOONSHOT])
-            
-        elif provider == LLMProvider.DASHSCOPE:
-            return self._call_openai_compatible(model_name, prompt, "https://dashscope.aliyuncs.com/compatible-mode/v1", self.api_keys[LLMProvider.DASHSCOPE])
-            
-        elif provider == LLMProvider.ZHIPU:
-            return self._call_openai_compatible(model_name, prompt, "https://open.bigmodel.cn/api/paas/v4", self.api_keys[LLMProvider.ZHIPU])
-            
-        elif provider == LLMProvider.DEEPSEEK:
-            return self._call_openai_compatible(model_name, prompt, "https://api.deepseek.com", self.api_keys[LLMProvider.DEEPSEEK])
-            
-        elif provider == LLMProvider.SILICONFLOW:
-            return self._call_openai_compatible(model_name, prompt, "https://api.siliconflow.cn/v1", self.api_keys[LLMProvider.SILICONFLOW])
-            
+
+        # Every other provider speaks the OpenAI protocol; only the endpoint differs
+        base_url = self._resolve_base_url(provider)
+        if base_url:
+            return self._call_openai_compatible(model_name, prompt, base_url, self.api_keys[provider])
         return None
 
-    def generate_batch(self, tasks: List[Dict], model_name: str = "gemini-1.5-flash") -> List[Dict]:
-        results = []
+    def _resolve_base_url(self, provider: LLMProvider) -> Optional[str]:
+        return self._base_urls.get(provider)
+
+    async def _acall_openai_compatible(self, session, model_name: str, prompt: str, base_url: str,
+                                       api_key: str) -> Optional[str]:
+        if not api_key:
+            print(f"❌ Error: API Key for {model_name} not found.")
+            return None
+        import aiohttp
+        data = {
+            "model": model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.TEMPERATURE
+        }
+        # Same policy as _call_openai_compatible: 429/503 honour Retry-After and back the shared
+        # limiter off, network errors/timeouts back off exponentially; plain 5xx are retried too
+        # (the requests Session adapter does that on the sync path)
+        for attempt in range(self.MAX_RETRIES + 1):
+            await self.async_limiter.wait()
+            try:
+                async with session.post(f"{base_url}/chat/completions", json=data,
+                                        headers={"Authorization": f"Bearer {api_key}"},
+                                        timeout=aiohttp.ClientTimeout(total=60)) as response:
+                    if response.status in (429, 500, 502, 503, 504) and attempt < self.MAX_RETRIES:
+                        delay = _retry_after(response.headers) if response.status in (429, 503) else None
+                        if delay is None:
+                            delay = self.BACKOFF_BASE * 2 ** attempt
+                        if response.status in (429, 503):
+                            self.limiter.backoff(delay)
+                            print(f"⏳ {model_name}: HTTP {response.status}, retrying in {delay:.1f}s...")
+                        await asyncio.sleep(delay + random.uniform(0, 0.5))
+                        continue
+                    response.raise_for_status()
+                    res_json = await response.json(content_type=None)
+                    self.limiter.relax()
+                    return res_json['choices'][0]['message']['content'].strip()
+            except aiohttp.ClientResponseError as e: # raise_for_status: not a network error
+                print(f"❌ OpenAI-compatible API error ({model_name}): {e}")
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < self.MAX_RETRIES:
+                    await asyncio.sleep(self.BACKOFF_BASE * 2 ** attempt + random.uniform(0, 0.5))
+                    continue
+                print(f"❌ OpenAI-compatible API error ({model_name}): {e}")
+                return None
+            except Exception as e:
+                print(f"❌ OpenAI-compatible API error ({model_name}): {e}")
+                return None
+        return None
+
+    async def agenerate_batch(self, tasks: List[Dict], model_name: str = "gemini-1.5-flash",
+                              prompt_prefix: str = "", on_result=None, use_cache: bool = True) -> List[Dict]:
+        """
+        generate_batch on asyncio: OpenAI-compatible providers go through one aiohttp session with
+        up to max_workers requests in flight and no thread per request. Gemini (sync SDK) calls run
+        in worker threads. Same result list (task order) and on_result callback as generate_batch.
+        """
+        import aiohttp
+        provider = self._get_provider(model_name)
+        base_url = self._resolve_base_url(provider)
+        total = len(tasks)
+        results = [None] * total
+        sem = asyncio.Semaphore(self.max_workers)
+        completed = 0
+        print(f"🚀 Starting async batch generation for {total} items (Concurrency: {self.max_workers}, Model: {model_name})...")
+
+        connector = aiohttp.TCPConnector(limit=self.max_workers * 4, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def one(slot, task):
+                nonlocal completed
+                async with sem:
+                    try:
+                        if base_url:
+                            text = await self._acall_openai_compatible(session, model_name, prompt_prefix + task['prompt'],
+                                                                       base_url, self.api_keys[provider])
+                        else:
+                            text = await asyncio.to_thread(self.generate_content, task['prompt'],
+                                                           model_name, True, prompt_prefix, use_cache)
+                        results[slot] = {**task, 'result': text}
+                    except Exception as e:
+                        results[slot] = {**task, 'result': None, 'error': str(e)}
+                if on_result:
+                    on_result(results[slot])
+                completed += 1
+                print(f"   Progress: {completed}/{total} (chunks)", flush=True)
+
+            await asyncio.gather(*(one(slot, task) for slot, task in enumerate(tasks)))
+        return results
+
+    def generate_batch(self, tasks: List[Dict], model_name: str = "gemini-1.5-flash", prompt_prefix: str = "",
+                       on_result=None, use_cache: bool = True) -> List[Dict]:
+        """
+        prompt_prefix is prepended to every task['prompt'] at send time, so a shared preamble is stored once.
+        on_result(result) is called for each task as soon as it finishes (e.g. to checkpoint it).
+        Results come back in task order: each one is placed in its task's slot as it completes.
+        OpenAI-compatible models run through agenerate_batch when aiohttp is installed (and the
+        response cache, which lives in the sync generate_content, is off or bypassed with use_cache=False).
+        """
+        if self._resolve_base_url(self._get_provider(model_name)) and not (self.use_cache and use_cache):
+            try:
+                import aiohttp
+                asyncio.get_running_loop()
+            except ImportError:
+                pass
+            except RuntimeError: # No loop running in this thread: safe to start one
+                return asyncio.run(self.agenerate_batch(tasks, model_name, prompt_prefix, on_result, use_cache))
+
+        results = [None] * len(tasks)
         total = len(tasks)
         print(f"🚀 Starting batch generation for {total} items (Workers: {self.max_workers}, Model: {model_name})...")
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_task = {
-                executor.submit(self.generate_content, task['prompt'], model_name): task 
-                for task in tasks
-            }
-            
-            completed = 0
+        executor = self._get_executor()
+        future_to_task = {
+            executor.submit(self.generate_content, task['prompt'], model_name, True, prompt_prefix, use_cache): (slot, task)
+            for slot, task in enumerate(tasks)
+        }
+        
+        completed = 0
+        try:
             for future in concurrent.futures.as_completed(future_to_task):
-                task = future_to_task[future]
+                slot, task = future_to_task[future]
                 try:
                     result_text = future.result()
-                    results.append({**task, 'result': result_text})
+                    results[slot] = {**task, 'result': result_text}
                 except Exception as e:
-                    results.append({**task, 'result': None, 'error': str(e)})
+                    results[slot] = {**task, 'result': None, 'error': str(e)}
+                if on_result:
+                    on_result(results[slot])
                 
                 completed += 1
                 print(f"   Progress: {completed}/{total} (chunks)", flush=True)
+        except BaseException:
+            # Ctrl+C / callback error: the pool outlives this call, so drop the queued tasks
+            for future in future_to_task:
+                future.cancel()
+            raise
                     
         return results
 
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Worker pool shared by every generate_batch call on this client, created on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                                       thread_name_prefix="llmcli")
+            return self._executor
+
+    def close(self):
+        """Shuts down the shared worker pool and HTTP connections."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        try:
+            self._session.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def generate_batch_job(self, tasks: List[Dict], model_name: str = "gemini-1.5-flash", poll_interval: int = 30,
+                           prompt_prefix: str = "") -> Optional[List[Dict]]:
+        """
+        Runs tasks through Gemini Batch Mode: one JSONL upload, one job, polled until it finishes.
+        Half the token price and no RPM ceiling, but results can take minutes to arrive.
+        Returns the same list shape as generate_batch, or None when batch mode is unavailable
+        (non-Gemini model, no key, google-genai not installed, job failed) so callers can fall back.
+        """
+        if self._get_provider(model_name) != LLMProvider.GEMINI:
+            return None
+        api_key = self.api_keys[LLMProvider.GEMINI]
+        if not api_key:
+            return None
+        try:
+            from google import genai as genai_sdk # Batch API lives in the newer google-genai SDK
+        except ImportError:
+            print("⚠️ google-genai is not installed; batch mode unavailable.")
+            return None
+
+        import tempfile
+        try:
+            gclient = genai_sdk.Client(api_key=api_key)
+            fd, jsonl_path = tempfile.mkstemp(suffix=".jsonl")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for task in tasks:
+                    req = {"contents": [{"role": "user", "parts": [{"text": prompt_prefix + task['prompt']}]}]}
+                    f.write(json.dumps({"key": str(task['index']), "request": req}, ensure_ascii=False) + "\n")
+            try:
+                uploaded = gclient.files.upload(file=jsonl_path, config={"display_name": "autosub-batch", "mime_type": "jsonl"})
+            finally:
+                os.remove(jsonl_path)
+
+            job = gclient.batches.create(model=model_name, src=uploaded.name, config={"display_name": "autosub-batch"})
+            print(f"📨 Submitted batch job {job.name} ({len(tasks)} requests, Model: {model_name}). Polling every {poll_interval}s...")
+            done_states = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+            while job.state.name not in done_states:
+                time.sleep(poll_interval)
+                job = gclient.batches.get(name=job.name)
+                print(f"   Batch state: {job.state.name}", flush=True)
+            if job.state.name != "JOB_STATE_SUCCEEDED":
+                print(f"❌ Batch job ended with {job.state.name}")
+                return None
+
+            by_key = {}
+            raw = gclient.files.download(file=job.dest.file_name)
+            for line in raw.decode("utf-8").splitlines():
+                if not line.strip(): continue
+                item = _json_loads(line)
+                try:
+                    parts = item["response"]["candidates"][0]["content"]["parts"]
+                    by_key[item.get("key")] = "".join(p.get("text", "") for p in parts).strip() or None
+                except (KeyError, IndexError, TypeError):
+                    pass # Per-request error; that task comes back with result None
+        except Exception as e:
+            print(f"❌ Gemini batch error: {e}")
+            return None
+
+        return [{**task, 'result': by_key.get(str(task['index']))} for task in tasks]
+
     def _list_openai_models(self, provider: LLMProvider) -> List[str]:
         api_key = self.api_keys.get(provider)
         if not api_key:
             return []
 
-        base_urls = {
-            LLMProvider.OPENAI: "https://api.openai.com/v1",
-            LLMProvider.MOONSHOT: "https://api.moonshot.cn/v1",
-            LLMProvider.DASHSCOPE: "https://dashscope.aliyuncs.com/compatible-mode/v1",
-            LLMProvider.ZHIPU: "https://open.bigmodel.cn/api/paas/v4",
-            LLMProvider.DEEPSEEK: "https://api.deepseek.com",
-            LLMProvider.SILICONFLOW: "https://api.siliconflow.cn/v1"
-        }
-        
-        base_url = base_urls.get(provider)
+        base_url = _BASE_URLS.get(provider)
         if not base_url:
             return []
 
         try:
-            response = requests.get(f"{base_url}/models", headers={"Authorization": f"Bearer {api_key}"}, timeout=10)
+            response = self._session.get(f"{base_url}/models", headers={"Authorization": f"Bearer {api_key}"}, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = _json_loads(response.content)
             
             # Extract names and filter for "stable" chat models
             models = []
@@ -230,18 +750,12 @@ class LLMClient:
                 m_id = m.get('id', '')
                 # Filter out embedding, vision-only, or obscure assistant models
                 low_id = m_id.lower()
-                is_ignored = any(x in low_id for x in ['embedding', 'vector', 'search', 'text-moderation', 'whisper', 'dall-e', 'tts'])
+                is_ignored = any(t in low_id for t in _IGNORE_TOKENS)
                 if m_id and not is_ignored:
                     models.append(m_id)
             
             # Smart Sorting: Put primary brand models at the top
-            brand_map = {
-                LLMProvider.DASHSCOPE: "qwen",
-                LLMProvider.ZHIPU: "glm",
-                LLMProvider.MOONSHOT: "moonshot",
-                LLMProvider.DEEPSEEK: "deepseek"
-            }
-            brand = brand_map.get(provider, "")
+            brand = _BRAND_MAP.get(provider, "")
             
             def sort_key(name):
                 name_low = name.lower()
@@ -258,40 +772,42 @@ class LLMClient:
             
             # Fallback if discovery returns nothing but we have key
             if not models:
-                fallbacks = {
-                    LLMProvider.OPENAI: ["gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"],
-                    LLMProvider.MOONSHOT: ["moonshot-v1-8k", "moonshot-v1-32k"],
-                    LLMProvider.DASHSCOPE: ["qwen-turbo", "qwen-max"],
-                    LLMProvider.ZHIPU: ["glm-4-flash", "glm-4"],
-                    LLMProvider.DEEPSEEK: ["deepseek-chat", "deepseek-reasoner"],
-                    LLMProvider.SILICONFLOW: ["deepseek-ai/DeepSeek-V3", "deepseek-ai/DeepSeek-R1", "Qwen/Qwen2.5-72B-Instruct-128K"]
-                }
-                return fallbacks.get(provider, [])
+                return list(_FALLBACK_MODELS.get(provider, ()))
                 
             return models
         except Exception as e:
             # Silently fallback to a safe list on error
-            fallbacks = {
-                LLMProvider.OPENAI: ["gpt-4o", "gpt-4o-mini", "gpt-4-turbo"],
-                LLMProvider.MOONSHOT: ["moonshot-v1-8k", "moonshot-v1-32k"],
-                LLMProvider.DASHSCOPE: ["qwen-turbo", "qwen-max", "qwen-plus"],
-                LLMProvider.ZHIPU: ["glm-4-flash", "glm-4", "glm-4-air"],
-                LLMProvider.DEEPSEEK: ["deepseek-chat", "deepseek-reasoner"],
-                LLMProvider.SILICONFLOW: ["deepseek-ai/DeepSeek-V3", "deepseek-ai/DeepSeek-R1"]
-            }
-            return fallbacks.get(provider, [])
+            return list(_ERROR_FALLBACK_MODELS.get(provider, ()))
+
+    def _cached(self, provider: LLMProvider, fn, ttl: Optional[int] = None):
+        now = time.monotonic()
+        v = self._model_cache.get(provider)
+        if v and v[0] > now:
+            return v[1]
+        res = fn()
+        if res: # An empty list usually means a failed call; try again next time
+            self._model_cache[provider] = (now + (self.MODEL_LIST_TTL if ttl is None else ttl), res)
+        return res
+
+    def invalidate_model_cache(self, provider: Optional[LLMProvider] = None):
+        """Forgets cached model lists (all providers, or one), e.g. after the user changes a key."""
+        if provider is None:
+            self._model_cache.clear()
+        else:
+            self._model_cache.pop(provider, None)
 
     def list_models_by_provider(self, provider: LLMProvider) -> List[str]:
         api_key = self.api_keys.get(provider)
         if not api_key:
             return []
-            
+        # A UI refresh within MODEL_LIST_TTL reuses the last listing instead of re-polling the provider
+        return self._cached(provider, lambda: self._list_models_uncached(provider))
+
+    def _list_models_uncached(self, provider: LLMProvider) -> List[str]:
+        api_key = self.api_keys.get(provider)
         if provider == LLMProvider.GEMINI:
             try:
-                import google.generativeai as genai
-                if not self._gemini_configured:
-                    genai.configure(api_key=api_key)
-                    self._gemini_configured = True
+                genai = self._gemini()
                 models = []
                 for m in genai.list_models():
                     if 'generateContent' in m.supported_generation_methods:
@@ -303,9 +819,12 @@ class LLMClient:
         return self._list_openai_models(provider)
 
     def list_accessible_models(self) -> List[str]:
+        # Providers are queried concurrently (wall time = slowest one); results keep LLMProvider order
+        providers = list(LLMProvider)
         all_models = []
-        for p in LLMProvider:
-            all_models.extend(self.list_models_by_provider(p))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(providers)) as ex:
+            for models in ex.map(self.list_models_by_provider, providers):
+                all_models.extend(models)
         return all_models
 
 _CLIENT = None
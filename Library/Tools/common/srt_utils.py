@@ -1,7 +1,9 @@
 
 import os
 import re
+import io
 import glob
+import itertools
 
 def time_to_seconds(timestr):
     parts = timestr.replace(',', '.').split(':')
@@ -12,89 +14,107 @@ def parse_srt(content_or_path):
     Parses SRT content (string) or file path into a list of blocks.
     Each block is a dictionary: {'index': str, 'time': str, 'lines': list}
     """
+    return list(parse_srt_iter(content_or_path))
+
+def parse_srt_iter(content_or_path):
+    """
+    Same blocks as parse_srt, yielded one at a time while the file is read line by line,
+    so the whole text never has to be in memory next to the parsed blocks.
+    """
     if os.path.isfile(content_or_path):
-        with open(content_or_path, 'r', encoding='utf-8') as f:
-            content = f.read().lstrip('\ufeff')
+        f = open(content_or_path, 'r', encoding='utf-8')
     else:
-        content = content_or_path
+        f = io.StringIO(content_or_path.replace('\r\n', '\n'))
 
-    content = content.replace('\r\n', '\n')
-    blocks = re.split(r'\n\n+', content.strip())
-    parsed = []
-    
-    idx_counter = 1
-    
-    for block in blocks:
-        lines = block.split('\n')
-        lines = [l.strip() for l in lines if l.strip()]
-        if len(lines) >= 2:
-            idx = None
-            time = None
-            text = []
+    with f:
+        idx_counter = 1
+        lines = []
+        first = True
+        for raw in itertools.chain(f, ['\n']): # trailing blank line flushes the last block
+            if first:
+                raw = raw.lstrip('\ufeff')
+                first = False
+            if raw.rstrip('\n'):
+                if raw.strip(): lines.append(raw.strip())
+                continue
+            if not lines: continue
+            block = _parse_block(lines, idx_counter)
+            lines = []
+            if block:
+                yield block
+                idx_counter += 1
 
-            # Robust parsing for malformed blocks
-            if lines[0].isdigit() and '-->' in lines[1]:
-                idx = lines[0]
-                time = lines[1]
-                text = lines[2:]
-            elif '-->' in lines[0]:
+def _parse_block(lines, idx_counter):
+    """One block's non-empty, stripped lines -> block dict (None if it has no timing line)."""
+    if len(lines) < 2:
+        return None
+    idx = None
+    time = None
+    text = []
+
+    # Robust parsing for malformed blocks
+    if lines[0].isdigit() and '-->' in lines[1]:
+        idx = lines[0]
+        time = lines[1]
+        text = lines[2:]
+    elif '-->' in lines[0]:
+        idx = str(idx_counter)
+        time = lines[0]
+        text = lines[1:]
+    else:
+        found_time = False
+        for i, l in enumerate(lines):
+            if '-->' in l:
+                time = l
+                text = lines[i+1:]
                 idx = str(idx_counter)
-                time = lines[0]
-                text = lines[1:]
-            else:
-                found_time = False
-                for i, l in enumerate(lines):
-                    if '-->' in l:
-                        time = l
-                        text = lines[i+1:]
-                        idx = str(idx_counter)
-                        found_time = True
-                        break
-                if not found_time:
-                    continue
+                found_time = True
+                break
+        if not found_time:
+            return None
 
-            if '-->' in time:
-                # Handle cases where text might be merged into the timestamp line
-                time_parts = time.split('-->')
-                start_str = time_parts[0].strip()
-                rem = time_parts[1].strip()
-                
-                # Check if there is text joined to the end timestamp
-                # Format: 00:00:10,000Text...
-                m = re.match(r"(\d{1,2}:\d{2}:\d{2}[\.,]\d{3})(.*)", rem)
-                if m:
-                    end_str = m.group(1)
-                    extra_text = m.group(2).strip()
-                    if extra_text:
-                        text = [extra_text] + text
-                else:
-                    end_str = rem
+    if '-->' in time:
+        # Handle cases where text might be merged into the timestamp line
+        time_parts = time.split('-->')
+        start_str = time_parts[0].strip()
+        rem = time_parts[1].strip()
+        
+        # Check if there is text joined to the end timestamp
+        # Format: 00:00:10,000Text...
+        m = re.match(r"(\d{1,2}:\d{2}:\d{2}[\.,]\d{3})(.*)", rem)
+        if m:
+            end_str = m.group(1)
+            extra_text = m.group(2).strip()
+            if extra_text:
+                text = [extra_text] + text
+        else:
+            end_str = rem
 
-                start_sec = time_to_seconds(start_str)
-                end_sec = time_to_seconds(end_str)
-            else:
-                start_sec = 0.0
-                end_sec = 0.0
+        start_sec = time_to_seconds(start_str)
+        end_sec = time_to_seconds(end_str)
+    else:
+        start_sec = 0.0
+        end_sec = 0.0
 
-            parsed.append({
-                'index': idx,
-                'time': time,
-                'start': start_sec,
-                'end': end_sec,
-                'lines': text
-            })
-            idx_counter += 1
-    return parsed
+    return {
+        'index': idx,
+        'time': time,
+        'start': start_sec,
+        'end': end_sec,
+        'lines': text
+    }
 
 def write_srt(subs, path):
-    """Writes a list of subtitle blocks to a file."""
-    with open(path, 'w', encoding='utf-8') as f:
+    """Writes a list of subtitle blocks to a file (atomically: temp file + os.replace)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         for i, sub in enumerate(subs):
             f.write(f"{i+1}\n") 
             f.write(f"{sub['time']}\n")
             for line in sub['lines']:
                 f.write(f"{line}\n")
             f.write("\n")
+    os.replace(tmp_path, path)
     print(f"Wrote {len(subs)} entries to {path}")
 
 def is_chinese(text):
@@ -188,6 +208,7 @@ def merge_tracks(path_master, path_secondary, output_path):
     Merges two SRT files using time-based overlap detection (Smart Merge).
     path_master: The translated track (usually CN).
     path_secondary: The source track (usually EN/Original).
+    Either track may also be passed as already-parsed blocks to skip re-reading it from disk.
     
     CRITICAL CHANGE: This function now drives from the secondary (source) track to ensure no lines are dropped.
     If a translated block is missing, the original line is kept with an empty translation field.
@@ -199,10 +220,16 @@ def merge_tracks(path_master, path_secondary, output_path):
             print(f"Processing... {desc}")
             return iterable
             
-    print(f"Loading Master (Translation): {path_master}")
-    subs_master = parse_srt(path_master)
-    print(f"Loading Secondary (Source): {path_secondary}")
-    subs_secondary = parse_srt(path_secondary)
+    if isinstance(path_master, list):
+        subs_master = path_master
+    else:
+        print(f"Loading Master (Translation): {path_master}")
+        subs_master = parse_srt(path_master)
+    if isinstance(path_secondary, list):
+        subs_secondary = path_secondary
+    else:
+        print(f"Loading Secondary (Source): {path_secondary}")
+        subs_secondary = parse_srt(path_secondary)
     
     print("\\n--- Synchronization Safety Check ---")
     len_m = len(subs_master)
@@ -296,6 +323,37 @@ def merge_tracks(path_master, path_secondary, output_path):
         })
             
     write_srt(merged, output_path)
+    return merged
+
+_TIMING_RE = re.compile(rb"(\d{1,2}):(\d{2}):(\d{2})[\.,](\d{3})\s*-->\s*(\d{1,2}):(\d{2}):(\d{2})[\.,](\d{3})")
+
+def _timing_bounds(m):
+    h1, m1, s1, ms1, h2, m2, s2, ms2 = (int(g) for g in m.groups())
+    return h1*3600 + m1*60 + s1 + ms1/1000.0, h2*3600 + m2*60 + s2 + ms2/1000.0
+
+def srt_fast_duration(path, window=4096):
+    """
+    Same result as get_srt_duration, but only reads the head and tail of the file
+    (first start / last end timestamps) instead of parsing every block.
+    """
+    size = os.stat(path).st_size
+    if size == 0: return 0
+    with open(path, 'rb') as f:
+        head = f.read(window)
+        f.seek(max(0, size - window))
+        tail = f.read()
+    first = _TIMING_RE.search(head)
+    last = None
+    for last in _TIMING_RE.finditer(tail): pass
+    if not first or not last: return 0
+    return _timing_bounds(last)[1] - _timing_bounds(first)[0]
+
+def srt_fast_count(path):
+    """Counts subtitle blocks by their timing arrows, via mmap (no decode, no parse)."""
+    import mmap
+    if os.stat(path).st_size == 0: return 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return sum(1 for _ in re.finditer(rb"-->", mm))
 
 def get_srt_duration(path):
     """Returns the total duration of an SRT file in seconds."""
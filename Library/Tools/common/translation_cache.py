@@ -0,0 +1,94 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+
+# Translation memory for subtitle lines, shared by every run on this machine (opt-in).
+# Exact hits are keyed by sha1(model|style|normalized text); the optional semantic layer
+# (llm_utils.SemanticCache, if numpy + sentence-transformers are installed) also matches near-duplicates.
+# Translations are stored as the model returned them, before humanization.
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".autosub_translations.sqlite")
+
+_NORM_RE = re.compile(r"\s+")
+
+def normalize(text):
+    """
+    Case/whitespace-insensitive form used for keys: 'Right,  right.' == 'right, right.'.
+    Punctuation is kept, 'Really?' and 'Really.' translate differently.
+    """
+    return _NORM_RE.sub(" ", text.casefold()).strip()
+
+def _key(model, style, norm):
+    return hashlib.sha1(f"{model}|{style}|{norm}".encode("utf-8")).hexdigest()
+
+class TranslationCache:
+    def __init__(self, path=CACHE_PATH, semantic=False, threshold=0.95):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS lines "
+                          "(key TEXT PRIMARY KEY, model TEXT, style TEXT, src TEXT, dst TEXT, vec BLOB)")
+        self.threshold = threshold
+        self.semantic = semantic
+        self._sem = {}       # "model|style" -> SemanticCache loaded from the stored vectors
+        self._miss_vecs = {} # source text -> embedding from the last lookup, reused by put_many
+
+    def _semantic_for(self, model, style):
+        """SemanticCache holding every stored line of this model + style, built on first use."""
+        scope = f"{model}|{style}"
+        if scope not in self._sem:
+            sem = None
+            try:
+                import numpy as np
+                from llm_utils import SemanticCache
+                with self.lock:
+                    rows = self.conn.execute("SELECT dst, vec FROM lines WHERE model = ? AND style = ? AND vec IS NOT NULL",
+                                             (model, style)).fetchall()
+                sem = SemanticCache(self.threshold, max_entries=len(rows) + 100000)
+                for dst, vec in rows:
+                    sem.put(scope, np.frombuffer(vec, dtype="float32"), dst)
+            except Exception as e:
+                print(f"⚠️ Semantic cache disabled ({e}); using exact matches only.")
+            self._sem[scope] = sem
+        return self._sem[scope]
+
+    def get_many(self, model, style, texts):
+        """Returns {text: cached translation} for the texts that hit."""
+        norms = {t: normalize(t) for t in texts}
+        keys = {t: _key(model, style, n) for t, n in norms.items() if n}
+        found = {}
+        with self.lock:
+            uniq = list(set(keys.values()))
+            for i in range(0, len(uniq), 500): # stay under sqlite's bound-parameter limit
+                part = uniq[i:i + 500]
+                rows = self.conn.execute(f"SELECT key, dst FROM lines WHERE key IN ({','.join('?' * len(part))})", part)
+                found.update(rows.fetchall())
+        hits = {t: found[k] for t, k in keys.items() if k in found}
+
+        misses = [t for t in keys if t not in hits]
+        sem = self._semantic_for(model, style) if self.semantic and misses else None
+        if sem:
+            scope = f"{model}|{style}"
+            for t in misses:
+                text, vec = sem.get(scope, t)
+                if text is not None:
+                    hits[t] = text
+                else:
+                    self._miss_vecs[t] = vec
+        return hits
+
+    def put_many(self, model, style, pairs):
+        """Stores (source text, translation) pairs."""
+        pairs = [(s, d) for s, d in dict(pairs).items() if d and normalize(s)]
+        if not pairs: return
+        vecs = [self._miss_vecs.get(s) for s, _ in pairs]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO lines (key, model, style, src, dst, vec) VALUES (?, ?, ?, ?, ?, ?)",
+                [(_key(model, style, normalize(s)), model, style, s, d, v.tobytes() if v is not None else None)
+                 for (s, d), v in zip(pairs, vecs)])
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -47,34 +47,39 @@ FFMPEG_PATH = get_ffmpeg_path()
 if FFMPEG_PATH != "ffmpeg":
     print(f"📦 Found FFmpeg at: {FFMPEG_PATH}")
 
+# Rate-control options per encoder (also used when the caller already picked one via --encoder)
+ENCODER_OPTS = {
+    "h264_nvenc": ["-preset", "p4", "-rc", "constqp", "-qp", "23"],
+    "h264_qsv": ["-preset", "veryfast", "-global_quality", "23"],
+    "h264_amf": ["-quality", "speed", "-rc", "cqp", "-qp_i", "23", "-qp_p", "23"],
+    "libx264": ["-preset", "veryfast", "-crf", "23", "-threads", "0"],
+}
+HW_ENCODERS = ["h264_nvenc", "h264_qsv", "h264_amf"] # Preference order
+
 def get_optimized_encoder(ffmpeg_path):
-    """Detects available hardware encoders by running a robust dry-run test."""
+    """
+    Detects available hardware encoders by running a robust dry-run test.
+    Returns (encoder name, options): the first hardware encoder that ffmpeg both lists and can
+    actually open, else libx264. autosub.py uses this too, so both pick the same encoder.
+    """
+    flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
     try:
-        # Run a 0.1-second dummy encode to test if NVENC actually works on the GPU.
-        # This prevents returning 'nvenc' on machines that list it but lack CUDA drivers/DLLs.
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        
-        test_cmd = [
-            ffmpeg_path,
-            "-v", "error", 
-            "-f", "lavfi", 
-            "-i", "nullsrc=s=128x128:d=0.1", 
-            "-c:v", "h264_nvenc", 
-            "-f", "null", 
-            "-"
-        ]
-        
-        result = subprocess.run(test_cmd, capture_output=True, startupinfo=startupinfo)
-        
-        if result.returncode == 0:
-            print("🚀 Hardware Acceleration (NVENC) Enabled & Verified!")
-            return "h264_nvenc", ["-preset", "p4", "-rc", "constqp", "-qp", "23"]
+        listed = subprocess.run([ffmpeg_path, "-hide_banner", "-encoders"], capture_output=True, text=True,
+                                errors="replace", creationflags=flags).stdout
+        for enc in HW_ENCODERS:
+            if enc not in listed: continue
+            # Run a 0.1-second dummy encode to test if the encoder actually works on the GPU.
+            # This prevents returning e.g. 'nvenc' on machines that list it but lack CUDA drivers/DLLs.
+            test_cmd = [ffmpeg_path, "-v", "error", "-f", "lavfi", "-i", "nullsrc=s=256x256:d=0.1",
+                        "-c:v", enc, "-f", "null", "-"]
+            if subprocess.run(test_cmd, capture_output=True, creationflags=flags).returncode == 0:
+                print(f"🚀 Hardware Acceleration ({enc}) Enabled & Verified!")
+                return enc, ENCODER_OPTS[enc]
     except Exception as e:
         pass
         
     print("ℹ️ Using CPU encoding (libx264, preset=veryfast) for maximum stability.")
-    return "libx264", ["-preset", "veryfast", "-crf", "23", "-threads", "0"]
+    return "libx264", ENCODER_OPTS["libx264"]
 
 def parse_time_str(time_str):
     """Converts HH:MM:SS.mm to seconds."""
@@ -132,9 +137,12 @@ def validate_ass(ass_path):
     return True, warnings
 
 class BurnProgressApp:
-    def __init__(self, root, video_path, ass_path, output_path, headless=False):
+    def __init__(self, root, video_path, ass_path, output_path, headless=False, encoder=None, force_style=None, threads=None):
         self.root = root
         self.headless = headless
+        self.encoder = encoder
+        self.threads = threads # libx264 thread cap (None = ffmpeg picks, "-threads 0")
+        self.force_style = force_style # Set => ass_path is a plain SRT burned via the subtitles filter
         
         self.video_path = video_path
         self.ass_path = ass_path
@@ -293,7 +301,7 @@ class BurnProgressApp:
         # (FFmpeg's -vf ass=... breaks on spaces, colons, and unicode strings).
         import uuid
         uid = uuid.uuid4().hex[:8]
-        temp_ass_name = f"tmp_sub_{uid}.ass"
+        temp_ass_name = f"tmp_sub_{uid}" + (".srt" if self.force_style else ".ass")
         temp_ass_path = os.path.join(work_dir, temp_ass_name)
         
         try:
@@ -302,13 +310,22 @@ class BurnProgressApp:
             self.update_status(f"Error copying subtitle: {str(e)[:50]}...", "red")
             return
 
-        encoder_name, encoder_opts = get_optimized_encoder(FFMPEG_PATH)
-
-        cmd = [
-            FFMPEG_PATH,
-            "-y",
+        if self.encoder in ENCODER_OPTS:
+            encoder_name, encoder_opts = self.encoder, ENCODER_OPTS[self.encoder]
+            print(f"🚀 Using encoder: {encoder_name}")
+        else:
+            encoder_name, encoder_opts = get_optimized_encoder(FFMPEG_PATH)
+        if self.threads and "-threads" in encoder_opts:
+            # Several burns may share the machine: cap this one at its share of the cores
+            encoder_opts = list(encoder_opts)
+            encoder_opts[encoder_opts.index("-threads") + 1] = str(self.threads)
+
+        cmd = [FFMPEG_PATH, "-y"]
+        if encoder_name != "libx264":
+            cmd += ["-hwaccel", "auto"] # GPU decode too; frames come back to system memory for the ass filter
+        cmd += [
             "-i", os.path.abspath(self.video_path), 
-            "-vf", f"ass={temp_ass_name}", # Safe, short, relative filename!
+            "-vf", f"subtitles={temp_ass_name}:force_style='{self.force_style}'" if self.force_style else f"ass={temp_ass_name}", # Safe, short, relative filename!
             "-c:a", "copy",
             "-c:v", encoder_name
         ]
@@ -433,13 +450,31 @@ if __name__ == "__main__":
     ass = sys.argv[2] if len(sys.argv) > 2 else "subs.ass"
     out = sys.argv[3] if len(sys.argv) > 3 else "out.mp4"
 
+    encoder = None
+    if "--encoder" in sys.argv:
+        idx = sys.argv.index("--encoder")
+        if idx + 1 < len(sys.argv):
+            encoder = sys.argv[idx + 1]
+
+    threads = None
+    if "--threads" in sys.argv:
+        idx = sys.argv.index("--threads")
+        if idx + 1 < len(sys.argv):
+            threads = int(sys.argv[idx + 1])
+
+    force_style = None
+    if "--force-style" in sys.argv:
+        idx = sys.argv.index("--force-style")
+        if idx + 1 < len(sys.argv):
+            force_style = sys.argv[idx + 1]
+
     if "--headless" in sys.argv:
          # Headless mode: No GUI
-         app = BurnProgressApp(None, video, ass, out, headless=True)
+         app = BurnProgressApp(None, video, ass, out, headless=True, encoder=encoder, force_style=force_style, threads=threads)
          # In headless mode, start_process calls run_ffmpeg synchronously
          if not app.finished:
              sys.exit(1)
     else:
          root = tk.Tk()
-         app = BurnProgressApp(root, video, ass, out)
+         app = BurnProgressApp(root, video, ass, out, encoder=encoder, force_style=force_style, threads=threads)
          root.mainloop()
@@ -199,9 +199,10 @@ def process_validate(args):
     if issues == 0: print("Basic validation passed.")
     else: print(f"Found {issues} issues.")
 
-def run_fill(input_path):
+def run_fill(input_path, subs=None):
     input_path = os.path.abspath(input_path)
-    subs = srt_utils.parse_srt(input_path)
+    if subs is None:
+        subs = srt_utils.parse_srt(input_path)
     gaps = []
     
     for i, sub in enumerate(subs):
@@ -292,6 +293,67 @@ def run_comparison(src_path, trans_path):
 def process_compare(args):
     run_comparison(args.source_file, args.translated_file)
 
+def process_pipeline(args):
+    """
+    One-shot translate + merge + fill for a single English SRT.
+    The source is parsed once and the blocks are handed from stage to stage in memory,
+    so the caller spawns one interpreter instead of smart_translate + merge.
+    """
+    input_path = os.path.abspath(args.input_file)
+    if not os.path.exists(input_path):
+        print(f"❌ File not found: {input_path}")
+        sys.exit(1)
+
+    autosub_dir = os.path.join(os.path.dirname(current_dir), 'autosub')
+    if autosub_dir not in sys.path:
+        sys.path.insert(0, autosub_dir)
+    import smart_translate
+
+    # Fill step picks its model from the environment (see run_fill)
+    os.environ["GEMINI_MODEL"] = args.model
+
+    print(f"🚀 Translate + Merge pipeline for: {os.path.basename(input_path)}")
+    print(f"   Style: {args.style} | Chunk Size: {args.chunk_size}")
+
+    subs_en = srt_utils.parse_srt(input_path)
+    if not subs_en:
+        print("❌ Error parsing SRT file.")
+        sys.exit(1)
+
+    # Finished chunks are checkpointed next to the output, so a rerun after a crash picks up where it stopped
+    cn_path = smart_translate.get_output_path(input_path)
+    progress_path = os.path.splitext(cn_path)[0] + ".progress.jsonl"
+    subs_cn = smart_translate.translate_srt(subs_en, args.style, args.model, args.chunk_size,
+                                            progress_path=progress_path)
+    if subs_cn is None:
+        sys.exit(1)
+
+    srt_utils.write_srt(subs_cn, cn_path)
+    print(f"✅ Translation Saved to: {cn_path}", flush=True)
+
+    base_name = os.path.basename(cn_path)[:-7]
+    output_dir = os.path.dirname(cn_path)
+    final_bi_path = os.path.join(output_dir, f"{base_name}.bi.srt")
+    print(f"Using SMART MERGE logic (Time-based alignment) -> {final_bi_path}")
+    merged = srt_utils.merge_tracks(subs_cn, subs_en, final_bi_path)
+    try: os.remove(progress_path)
+    except OSError: pass
+
+    print("\n--- Auto-Filling Gaps ---")
+    fill_count = run_fill(final_bi_path, merged)
+    if fill_count > 0:
+        print(f"✅ Filled {fill_count} gaps. Syncing back to Monolingual tracks...")
+        try:
+            _, temp_cn = srt_utils.extract_tracks(final_bi_path, output_dir)
+            if os.path.exists(temp_cn) and temp_cn != cn_path:
+                shutil.move(temp_cn, cn_path)
+        except Exception as e:
+            print(f"⚠️ Could not sync back to translated file: {e}")
+    else:
+        print("No gaps found requiring fill.")
+
+    print(f"Merge & Fix pipeline complete. Output: {final_bi_path}")
+
 def main():
     parser = argparse.ArgumentParser(description="Subtranslator Tool")
     subparsers = parser.add_subparsers(dest='step', required=True)
@@ -301,6 +363,7 @@ def main():
     p_val = subparsers.add_parser('validate'); p_val.add_argument('input_file')
     p_fill = subparsers.add_parser('fill'); p_fill.add_argument('input_file')
     p_comp = subparsers.add_parser('compare'); p_comp.add_argument('source_file'); p_comp.add_argument('translated_file')
+    p_pipe = subparsers.add_parser('pipeline'); p_pipe.add_argument('input_file'); p_pipe.add_argument('--style', default='casual'); p_pipe.add_argument('--model', default='gemini-3-pro'); p_pipe.add_argument('--chunk-size', type=int, default=50)
 
     args = parser.parse_args()
     if args.step == 'split': process_split(args)
@@ -308,6 +371,7 @@ def main():
     elif args.step == 'validate': process_validate(args)
     elif args.step == 'fill': process_fill(args)
     elif args.step == 'compare': process_compare(args)
+    elif args.step == 'pipeline': process_pipeline(args)
 
 if __name__ == "__main__":
     main()
@@ -306,7 +306,7 @@ def get_project_folder(file_path):
 
 def main():
     if len(sys.argv) < 3:
-        print("Usage: python transcribe_engine.py <mode> <file_path> [--model model_name]")
+        print("Usage: python transcribe_engine.py <mode> <file_path | - --name <video_name>> [--model model_name]")
         sys.exit(1)
         
     mode = sys.argv[1]
@@ -314,6 +314,10 @@ def main():
     
     selected_model = DEFAULT_MODEL_SIZE
     custom_output_dir = None
+    # "-" = raw 16 kHz mono s16le PCM on stdin (piped from ffmpeg); --name / --duration describe the source video
+    from_stdin = file_path == "-"
+    source_name = None
+    stdin_duration = 0
     
     # Parse args manually since we aren't using argparse yet
     if "--model" in sys.argv:
@@ -330,25 +334,44 @@ def main():
                 custom_output_dir = sys.argv[idx + 1]
         except: pass
             
+    if "--name" in sys.argv:
+        try:
+            idx = sys.argv.index("--name")
+            if idx + 1 < len(sys.argv):
+                source_name = sys.argv[idx + 1]
+        except: pass
+
+    if "--duration" in sys.argv:
+        try:
+            idx = sys.argv.index("--duration")
+            if idx + 1 < len(sys.argv):
+                stdin_duration = float(sys.argv[idx + 1])
+        except: pass
+
+    if from_stdin and not source_name:
+        print("Error: --name is required when reading audio from stdin.")
+        sys.exit(1)
+    display_name = source_name or os.path.basename(file_path)
+            
     if mode == "estimate":
         dur = get_duration(file_path)
         est = estimate_processing_time(dur)
         print(json.dumps({"duration": dur, "estimated_seconds": est}))
         
     elif mode == "run":
-        if not os.path.exists(file_path):
+        if not from_stdin and not os.path.exists(file_path):
             print(f"Error: File {file_path} not found.")
             sys.exit(1)
 
         if custom_output_dir:
             project_dir = custom_output_dir
         else:
-            project_dir = get_project_folder(file_path)
+            project_dir = get_project_folder(display_name)
             
         if not os.path.exists(project_dir):
             try: os.makedirs(project_dir)
             except: 
-                if not custom_output_dir: # Only fallback if not custom
+                if not custom_output_dir and not from_stdin: # Only fallback if not custom
                     project_dir = os.path.dirname(os.path.abspath(file_path))
         
         output_dir = project_dir
@@ -358,13 +381,13 @@ def main():
         if raw_model_name.startswith("faster-whisper-"):
             raw_model_name = raw_model_name.replace("faster-whisper-", "", 1)
             
-        print(f"File: {os.path.basename(file_path)}")
+        print(f"File: {display_name}")
         print(f"Output: {output_dir}")
         print(f"Model: {raw_model_name}")
         print(f"Starting transcription...")
         
         # Get duration for progress calculation
-        total_duration = get_duration(file_path)
+        total_duration = stdin_duration if from_stdin else get_duration(file_path)
         
         # Setup specific UI for progress
         no_gui = "--no-gui" in sys.argv
@@ -387,7 +410,7 @@ def main():
                 root.resizable(False, False)
                 
                 # Label
-                lbl_status = tk.Label(root, text=f"Processing: {os.path.basename(file_path)}", wraplength=380)
+                lbl_status = tk.Label(root, text=f"Processing: {display_name}", wraplength=380)
                 lbl_status.pack(pady=10)
                 
                 # Progress bar
@@ -468,7 +491,14 @@ def main():
                     print(f"❌ Error loading model: {e}")
                     sys.exit(1)
 
-            segments, info = model.transcribe(file_path, beam_size=5, vad_filter=True, initial_prompt="Claude Code, Anthropic, AI Agent", word_timestamps=True)
+            audio = file_path
+            if from_stdin:
+                import numpy as np
+                audio = np.frombuffer(sys.stdin.buffer.read(), dtype=np.int16).astype(np.float32) / 32768.0
+                print(f"Read {len(audio) / 16000:.0f}s of piped audio.")
+                if not total_duration: total_duration = len(audio) / 16000
+
+            segments, info = model.transcribe(audio, beam_size=5, vad_filter=True, initial_prompt="Claude Code, Anthropic, AI Agent", word_timestamps=True)
             
             print("Detected language '%s' with probability %f" % (info.language, info.language_probability))
 
@@ -501,7 +531,7 @@ def main():
 
             print(f"✅ Transcription complete. {len(segments_list)} segments collected.")
 
-            srt_path = os.path.join(output_dir, os.path.splitext(os.path.basename(file_path))[0] + ".srt")
+            srt_path = os.path.join(output_dir, os.path.splitext(display_name)[0] + ".srt")
             
             with open(srt_path, "w", encoding="utf-8") as f:
                 # Pass the early detected style to chunk_segments
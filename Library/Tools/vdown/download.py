@@ -4,6 +4,8 @@ import datetime
 import subprocess
 import re
 import time
+import queue
+import threading
 from pathlib import Path
 
 # --- Configuration ---
@@ -33,13 +35,31 @@ if getattr(sys, 'frozen', False):
 else:
     DOWNLOAD_ROOT = r"d:\cc\download"
 
+# Resolved once at import; every yt-dlp command starts with the same runtime options
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+_DEFAULT_COOKIES = os.path.join(_SCRIPT_DIR, "cookies.txt")
+_YTDLP_BASE = (YTDLP_EXE, "--js-runtimes", f"node:{NODE_EXE}", "--remote-components", "ejs:github")
+_NO_WINDOW = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
 def log(message):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
 
+def resolve_cookies(custom_cookies=None):
+    """The cookies file to hand to yt-dlp: the custom one if it exists, else the bundled cookies.txt."""
+    # Only an existence check: yt-dlp parses (and complains about) the file itself
+    if custom_cookies and os.path.exists(custom_cookies):
+        return custom_cookies
+    # One stat per call: the user may drop a cookies.txt in while the app is running
+    return _DEFAULT_COOKIES if os.path.exists(_DEFAULT_COOKIES) else None
+
+# Match "[download]  12.3% of" or "[download] 100%"
+_PROGRESS_RE = re.compile(r'\[download\]\s+(\d+\.?\d*)%')
+# Other yt-dlp lines worth showing for context (they start with one of these)
+_LOG_PREFIXES = ("[youtube]", "[info]", "ERROR", "WARNING")
+
 def get_progress_from_line(line):
-    # Match "[download]  12.3% of" or "[download] 100%"
-    match = re.search(r'\[download\]\s+(\d+\.?\d*)%', line)
+    match = _PROGRESS_RE.search(line)
     if match:
         return match.group(1)
     return None
@@ -50,8 +70,7 @@ def download_video(url, custom_cookies=None, out_dir=None):
     else:
         target_dir = DOWNLOAD_ROOT
 
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir, exist_ok=True)
+    Path(target_dir).mkdir(parents=True, exist_ok=True)
 
     log(f"🎬 Starting download via CLI...")
     log(f"   URL: {url}")
@@ -59,9 +78,7 @@ def download_video(url, custom_cookies=None, out_dir=None):
 
     # Build Command
     cmd = [
-        YTDLP_EXE,
-        "--js-runtimes", f"node:{NODE_EXE}",
-        "--remote-components", "ejs:github",
+        *_YTDLP_BASE,
         "--no-playlist",
         "--progress",
         "--newline",
@@ -69,12 +86,16 @@ def download_video(url, custom_cookies=None, out_dir=None):
         "-o", os.path.join(target_dir, "%(title)s [%(id)s] [%(height)sp].%(ext)s")
     ]
 
+    # yt-dlp reports the final (post-merge) path here; --print would imply --quiet and hide the logs
+    path_file = os.path.join(target_dir, ".last_download.txt")
+    if os.path.exists(path_file): os.remove(path_file)
+    cmd.extend(["--print-to-file", "after_move:filepath", path_file])
+
     # Handle cookies
-    cookies_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cookies.txt")
-    if custom_cookies and os.path.exists(custom_cookies):
-        log(f"Using custom cookies: {custom_cookies}")
-        cmd.extend(["--cookies", custom_cookies])
-    elif os.path.exists(cookies_file):
+    cookies_file = resolve_cookies(custom_cookies)
+    if cookies_file:
+        if cookies_file == custom_cookies:
+            log(f"Using custom cookies: {custom_cookies}")
         cmd.extend(["--cookies", cookies_file])
 
     cmd.append(url)
@@ -87,25 +108,55 @@ def download_video(url, custom_cookies=None, out_dir=None):
             text=True, 
             encoding='utf-8', 
             errors='replace',
-            bufsize=1,
-            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+            bufsize=1 << 16,
+            creationflags=_NO_WINDOW
         )
 
-        for line in process.stdout:
+        # A reader thread keeps draining yt-dlp's stdout so the download never waits on our printing.
+        # If we fall behind, progress lines are the ones dropped (the next one supersedes them anyway);
+        # that is the only throttling here, and the newest dropped one is still delivered at EOF.
+        lines_q = queue.Queue(maxsize=1024)
+        def _reader():
+            dropped = None
+            for raw in process.stdout:
+                try:
+                    lines_q.put_nowait(raw)
+                    if raw.startswith("[download]"): dropped = None
+                except queue.Full:
+                    if not raw.startswith("[download]"):
+                        lines_q.put(raw)
+                    else:
+                        dropped = raw
+            if dropped:
+                lines_q.put(dropped)
+            lines_q.put(None)
+        threading.Thread(target=_reader, daemon=True).start()
+
+        for line in iter(lines_q.get, None):
             line = line.strip()
             if not line: continue
             
-            p = get_progress_from_line(line)
-            if p:
-                print(f"Progress: {p}%", flush=True)
-            else:
+            # One prefix test per line; the regex only runs on [download] lines
+            if line.startswith("[download]"):
+                m = _PROGRESS_RE.match(line)
+                if m:
+                    print(f"Progress: {m.group(1)}%", flush=True)
+            elif line.startswith(_LOG_PREFIXES):
                 # Still show other logs for context
-                if "[youtube]" in line or "[info]" in line or "ERROR" in line or "WARNING" in line:
-                    print(line, flush=True)
+                print(line, flush=True)
 
         process.wait()
         if process.returncode == 0:
+            print("Progress: 100%", flush=True) # Finished state, whatever the last tick said
             log("✅ Download completed successfully.")
+            try:
+                with open(path_file, 'r', encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+                os.remove(path_file)
+                if lines:
+                    # Machine-readable line for callers (autosub picks the video from it)
+                    print(f"FILE: {lines[-1]}", flush=True)
+            except: pass
             return True
         else:
             log(f"❌ Download failed with exit code {process.returncode}")
@@ -117,9 +168,7 @@ def download_video(url, custom_cookies=None, out_dir=None):
 
 def get_title(url, cookies=None):
     cmd = [
-        YTDLP_EXE,
-        "--js-runtimes", f"node:{NODE_EXE}",
-        "--remote-components", "ejs:github",
+        *_YTDLP_BASE,
         "--get-title",
         "--no-playlist"
     ]
@@ -134,7 +183,7 @@ def get_title(url, cookies=None):
             text=True, 
             encoding='utf-8', 
             errors='replace',
-            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+            creationflags=_NO_WINDOW
         )
         if result.returncode == 0:
             return result.stdout.strip()
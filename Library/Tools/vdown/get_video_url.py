@@ -3,6 +3,10 @@ import os
 import http.cookiejar
 from playwright.sync_api import sync_playwright
 import time
+import re
+
+# One scan per intercepted request: most are scripts/images/XHR that contain none of these
+_STREAM_HINT_RE = re.compile(r'\.m3u8|\.mp4|manifest')
 
 def get_m3u8(url, cookies_path):
     # 1. Load Cookies
@@ -58,6 +62,8 @@ def get_m3u8(url, cookies_path):
             except:
                 pass
 
+            if not _STREAM_HINT_RE.search(url_lower):
+                return
             if "master.m3u8" in url_lower:
                 print(f"\n[!!!] Found master.m3u8: {request.url}")
                 found_urls.add(request.url)